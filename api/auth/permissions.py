@@ -1,61 +1,68 @@
+from types import MappingProxyType
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import List, Mapping, Optional
 
 from database.database import get_db
-from models.models import User, UserOrganization
-from schemas.schemas import RoleEnum, ROLE_PERMISSIONS
+from schemas.schemas import RoleEnum, ROLE_PERMISSIONS_BY_NAME, PERMISSION_BITS, ROLE_PERMISSION_BITS
 from auth.utils import get_current_active_user
 
+SUPER_ADMIN_ROLE = RoleEnum.SUPER_ADMIN.value
+CFO_ROLE = RoleEnum.CFO.value
+GENERAL_PARTNER_ROLE = RoleEnum.GENERAL_PARTNER.value
+FUND_ADMINISTRATOR_ROLE = RoleEnum.FUND_ADMINISTRATOR.value
+FUND_ACCOUNTANT_ROLE = RoleEnum.FUND_ACCOUNTANT.value
+EXTERNAL_AUDITOR_ROLE = RoleEnum.EXTERNAL_AUDITOR.value
+LEGAL_COMPLIANCE_ROLE = RoleEnum.LEGAL_COMPLIANCE.value
 
-def get_role_permissions(role: str) -> dict:
-    """Get permissions for a specific role"""
-    try:
-        role_enum = RoleEnum(role)
-        return ROLE_PERMISSIONS.get(role_enum, {})
-    except ValueError:
-        return {}
+
+_NO_PERMISSIONS: Mapping[str, bool] = MappingProxyType({})
+
+
+def get_role_permissions(role: str) -> Mapping[str, bool]:
+    """Get permissions for a specific role (read-only)"""
+    return ROLE_PERMISSIONS_BY_NAME.get(role, _NO_PERMISSIONS)
 
 
 def has_permission(role: str, permission: str) -> bool:
     """Check if a role has a specific permission"""
-    permissions = get_role_permissions(role)
-    return permissions.get(permission, False)
+    return bool(ROLE_PERMISSION_BITS.get(role, 0) & PERMISSION_BITS.get(permission, 0))
 
 
 async def get_user_role_in_organization(
-    user_id: int,
-    organization_id: int,
-    db: Session
+    user_id: str,
+    organization_id: str,
+    db: AsyncIOMotorDatabase
 ) -> Optional[str]:
     """Get user's role in a specific organization"""
-    mapping = db.query(UserOrganization).filter(
-        UserOrganization.user_id == user_id,
-        UserOrganization.organization_id == organization_id
-    ).first()
-    return mapping.role if mapping else None
+    mapping = await db["user_organizations"].find_one(
+        {"user_id": user_id, "organization_id": organization_id},
+        projection={"role": 1}
+    )
+    return mapping.get("role") if mapping else None
 
 
 async def get_user_organizations_with_roles(
-    user_id: int,
-    db: Session
+    user_id: str,
+    db: AsyncIOMotorDatabase
 ) -> List[dict]:
     """Get all organizations and roles for a user"""
-    mappings = db.query(UserOrganization).filter(
-        UserOrganization.user_id == user_id
-    ).all()
-    return [{"organization_id": m.organization_id, "role": m.role} for m in mappings]
+    cursor = db["user_organizations"].find(
+        {"user_id": user_id},
+        projection={"organization_id": 1, "role": 1}
+    )
+    return [{"organization_id": m.get("organization_id"), "role": m.get("role")} async for m in cursor]
 
 
-def is_super_admin(user: User, db: Session) -> bool:
+async def is_super_admin(user: dict, db: AsyncIOMotorDatabase) -> bool:
     """Check if user is a super admin in any organization"""
-    if user.is_superuser:
+    if user.get("is_superuser"):
         return True
-    mappings = db.query(UserOrganization).filter(
-        UserOrganization.user_id == user.id,
-        UserOrganization.role == RoleEnum.SUPER_ADMIN.value
-    ).first()
-    return mappings is not None
+    mapping = await db["user_organizations"].find_one(
+        {"user_id": user.get("id"), "role": SUPER_ADMIN_ROLE},
+        projection={"_id": 1}
+    )
+    return mapping is not None
 
 
 class RoleChecker:
@@ -63,24 +70,29 @@ class RoleChecker:
 
     def __init__(self, allowed_roles: List[str]):
         self.allowed_roles = allowed_roles
+        # Super admins always pass, so fold the role into the allowed set once
+        self._allowed = frozenset(allowed_roles) | {SUPER_ADMIN_ROLE}
+        self._allowed_list = list(self._allowed)
 
     async def __call__(
         self,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
-    ) -> User:
+        current_user: dict = Depends(get_current_active_user),
+        db: AsyncIOMotorDatabase = Depends(get_db)
+    ) -> dict:
         # Super users bypass role checks
-        if current_user.is_superuser:
+        if current_user.get("is_superuser"):
             return current_user
 
         # Check if user has any of the allowed roles in any organization
-        user_orgs = db.query(UserOrganization).filter(
-            UserOrganization.user_id == current_user.id
-        ).all()
-
-        for org in user_orgs:
-            if org.role in self.allowed_roles or org.role == RoleEnum.SUPER_ADMIN.value:
-                return current_user
+        mapping = await db["user_organizations"].find_one(
+            {
+                "user_id": current_user.get("id"),
+                "role": {"$in": self._allowed_list}
+            },
+            projection={"_id": 1}
+        )
+        if mapping:
+            return current_user
 
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -94,22 +106,23 @@ class OrganizationRoleChecker:
     def __init__(self, allowed_roles: List[str], org_id_param: str = "organization_id"):
         self.allowed_roles = allowed_roles
         self.org_id_param = org_id_param
+        self._allowed = frozenset(allowed_roles) | {SUPER_ADMIN_ROLE}
 
     async def __call__(
         self,
-        organization_id: int,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
-    ) -> User:
+        organization_id: str,
+        current_user: dict = Depends(get_current_active_user),
+        db: AsyncIOMotorDatabase = Depends(get_db)
+    ) -> dict:
         # Super users bypass role checks
-        if current_user.is_superuser:
+        if current_user.get("is_superuser"):
             return current_user
 
         # Check user's role in the specific organization
-        mapping = db.query(UserOrganization).filter(
-            UserOrganization.user_id == current_user.id,
-            UserOrganization.organization_id == organization_id
-        ).first()
+        mapping = await db["user_organizations"].find_one(
+            {"user_id": current_user.get("id"), "organization_id": organization_id},
+            projection={"role": 1}
+        )
 
         if not mapping:
             raise HTTPException(
@@ -117,7 +130,7 @@ class OrganizationRoleChecker:
                 detail="You don't have access to this organization"
             )
 
-        if mapping.role not in self.allowed_roles and mapping.role != RoleEnum.SUPER_ADMIN.value:
+        if mapping.get("role") not in self._allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have permission to perform this action"
@@ -127,8 +140,8 @@ class OrganizationRoleChecker:
 
 
 # Pre-defined role checkers for common use cases
-require_super_admin = RoleChecker([RoleEnum.SUPER_ADMIN.value])
-require_cfo_or_above = RoleChecker([RoleEnum.SUPER_ADMIN.value, RoleEnum.CFO.value, RoleEnum.GENERAL_PARTNER.value])
-require_fund_admin = RoleChecker([RoleEnum.SUPER_ADMIN.value, RoleEnum.CFO.value, RoleEnum.FUND_ADMINISTRATOR.value, RoleEnum.GENERAL_PARTNER.value])
-require_accountant_or_above = RoleChecker([RoleEnum.SUPER_ADMIN.value, RoleEnum.CFO.value, RoleEnum.FUND_ADMINISTRATOR.value, RoleEnum.FUND_ACCOUNTANT.value, RoleEnum.GENERAL_PARTNER.value])
-require_auditor_access = RoleChecker([RoleEnum.SUPER_ADMIN.value, RoleEnum.CFO.value, RoleEnum.EXTERNAL_AUDITOR.value, RoleEnum.LEGAL_COMPLIANCE.value])
+require_super_admin = RoleChecker([SUPER_ADMIN_ROLE])
+require_cfo_or_above = RoleChecker([SUPER_ADMIN_ROLE, CFO_ROLE, GENERAL_PARTNER_ROLE])
+require_fund_admin = RoleChecker([SUPER_ADMIN_ROLE, CFO_ROLE, FUND_ADMINISTRATOR_ROLE, GENERAL_PARTNER_ROLE])
+require_accountant_or_above = RoleChecker([SUPER_ADMIN_ROLE, CFO_ROLE, FUND_ADMINISTRATOR_ROLE, FUND_ACCOUNTANT_ROLE, GENERAL_PARTNER_ROLE])
+require_auditor_access = RoleChecker([SUPER_ADMIN_ROLE, CFO_ROLE, EXTERNAL_AUDITOR_ROLE, LEGAL_COMPLIANCE_ROLE])
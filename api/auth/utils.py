@@ -1,20 +1,38 @@
+import hashlib
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
+import bcrypt
+from cachetools import TTLCache
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
 from config import settings
-from database.database import get_db
-from repositories.mongo_repository import MongoRepository
+from repositories.mongo_repository import get_repo
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Resolve passlib's bcrypt backend now rather than on the first login
+pwd_context.hash("")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+# Decoded token payloads, keyed by a truncated hash of the token so raw tokens are never stored.
+# decode_token never awaits, so concurrent requests on the event loop cannot race a decode of
+# the same token: the first one populates the cache before any other coroutine runs.
+_decode_cache = TTLCache(maxsize=10000, ttl=30)
+_decode_cache_lock = threading.Lock()
+
+# Authenticated users by id, so most requests skip the users lookup
+_user_cache = TTLCache(maxsize=5000, ttl=30)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
+    # bcrypt is the only scheme in use, so skip passlib's scheme dispatch for it
+    if hashed_password.startswith(("$2a$", "$2b$", "$2y$")):
+        return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
     return pwd_context.verify(plain_password, hashed_password)
 
 
@@ -26,10 +44,11 @@ def get_password_hash(password: str) -> str:
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
+    now = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
@@ -37,12 +56,27 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def decode_token(token: str) -> Optional[dict]:
     """Decode and verify a JWT token"""
+    # JWTs are base64url ASCII, anything else cannot be a valid token
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        token_bytes = token.encode("ascii")
+    except UnicodeEncodeError:
+        return None
+    key = hashlib.sha256(token_bytes).digest()[:16]
+    with _decode_cache_lock:
+        payload = _decode_cache.get(key)
+    # Never serve a cached payload past the token's own expiry
+    if payload is not None and payload.get("exp", 0) > time.time():
         return payload
+
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
         return None
 
+    with _decode_cache_lock:
+        _decode_cache[key] = payload
+    return payload
+
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
     """Get the current authenticated user from the JWT token"""
@@ -60,14 +94,23 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
     if user_id is None:
         raise credentials_exception
 
-    repo = MongoRepository("users", get_db())
-    user = await repo.get_by_id(user_id)
+    user = _user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    user = await get_repo("users").get_by_id(user_id)
     if user is None:
         raise credentials_exception
 
+    _user_cache[user_id] = user
     return user
 
 
+def invalidate_cached_user(user_id: str) -> None:
+    """Drop a user from the authentication cache after it changes"""
+    _user_cache.pop(user_id, None)
+
+
 async def get_current_active_user(current_user: dict = Depends(get_current_user)) -> dict:
     """Get the current active user"""
     if not current_user.get("is_active", False):
@@ -1,7 +1,7 @@
 import os
 from pydantic_settings import BaseSettings
 from typing import Optional, List
-from functools import lru_cache
+from functools import cached_property, lru_cache
 
 
 class Settings(BaseSettings):
@@ -22,6 +22,20 @@ class Settings(BaseSettings):
     # Database name
     MONGODB_DB: str = "fund_ops"
 
+    # Connection pool (per worker process) and wire compression
+    MONGODB_MAX_POOL_SIZE: int = 50
+    MONGODB_MIN_POOL_SIZE: int = 5
+    MONGODB_MAX_IDLE_TIME_MS: int = 30000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 3000
+    MONGODB_COMPRESSORS: str = "zlib"
+
+    # Build the indexes at startup (the unique ones back the duplicate checks); disable when a migration builds them
+    MONGODB_ENSURE_INDEXES: bool = True
+
+    # Redis cache for organization-scoped reads (disabled if REDIS_URL is not set)
+    REDIS_URL: Optional[str] = None
+    CACHE_TTL_SECONDS: int = 60
+
     # JWT Authentication
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
@@ -32,20 +46,20 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     CORS_ORIGINS: str = "http://localhost:3000"
 
-    @property
+    @cached_property
     def cors_origins_list(self) -> List[str]:
         """Parse CORS_ORIGINS string into a list."""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
 
-    @property
+    @cached_property
     def is_development(self) -> bool:
         return self.ENV == "development"
 
-    @property
+    @cached_property
     def is_test(self) -> bool:
         return self.ENV == "test"
 
-    @property
+    @cached_property
     def is_production(self) -> bool:
         return self.ENV == "production"
 
@@ -0,0 +1,72 @@
+import logging
+from typing import Optional
+
+import orjson
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from config import settings
+from utils.responses import json_default
+
+logger = logging.getLogger(__name__)
+
+# Redis client (None when REDIS_URL is not configured)
+redis_client: Optional[aioredis.Redis] = None
+
+
+def init_cache():
+    """Initialize the Redis connection if REDIS_URL is configured"""
+    global redis_client
+    if settings.REDIS_URL:
+        redis_client = aioredis.from_url(settings.REDIS_URL)
+
+
+async def close_cache():
+    """Close the Redis connection"""
+    global redis_client
+    if redis_client is not None:
+        await redis_client.aclose()
+        redis_client = None
+
+
+def _key(collection: str, field: str, value) -> str:
+    return f"{collection}:{field}:{value}"
+
+
+async def cached_get_by_field(repo, field: str, value) -> list:
+    """
+    Read-through cache around repo.get_by_field (falls back to MongoDB if Redis is unavailable)
+    Cache hits come back JSON-decoded (datetimes and ObjectIds as strings), so callers must only
+    serialize the result, never compute on its values
+    """
+    if redis_client is None:
+        return await repo.get_by_field(field, value)
+
+    key = _key(repo.collection.name, field, value)
+    try:
+        cached = await redis_client.get(key)
+    except RedisError as e:
+        logger.warning("Redis read failed for %s: %s", key, e)
+        return await repo.get_by_field(field, value)
+    if cached is not None:
+        return orjson.loads(cached)
+
+    result = await repo.get_by_field(field, value)
+    try:
+        payload = orjson.dumps(result, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+        await redis_client.setex(key, settings.CACHE_TTL_SECONDS, payload)
+    except (RedisError, orjson.JSONEncodeError) as e:
+        logger.warning("Redis write failed for %s: %s", key, e)
+    return result
+
+
+async def invalidate_collection(collection: str):
+    """Drop every cached read for a collection after a write"""
+    if redis_client is None:
+        return
+    try:
+        keys = [key async for key in redis_client.scan_iter(match=f"{collection}:*")]
+        if keys:
+            await redis_client.delete(*keys)
+    except RedisError as e:
+        logger.warning("Redis invalidation failed for %s: %s", collection, e)
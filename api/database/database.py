@@ -1,8 +1,12 @@
+import logging
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure
 from typing import Optional
 
 from config import settings
 
+logger = logging.getLogger(__name__)
+
 # MongoDB client and database
 mongo_client: Optional[AsyncIOMotorClient] = None
 mongo_db = None
@@ -11,7 +15,15 @@ mongo_db = None
 def init_database():
     """Initialize MongoDB connection"""
     global mongo_client, mongo_db
-    mongo_client = AsyncIOMotorClient(settings.database_url)
+    mongo_client = AsyncIOMotorClient(
+        settings.database_url,
+        maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+        maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+        serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        retryWrites=True,
+        compressors=settings.MONGODB_COMPRESSORS,
+    )
     mongo_db = mongo_client[settings.MONGODB_DB]
 
 
@@ -23,6 +35,43 @@ def get_db():
     return mongo_db
 
 
+# Every index the app relies on, as (collection, keys, options); the seeder builds the same set
+INDEXES = [
+    ("users", "email", {"unique": True}),
+    ("users", "username", {"unique": True}),
+    ("organizations", "code", {"unique": True}),
+    # Also serves user_id lookups through its prefix
+    ("user_organizations", [("user_id", 1), ("organization_id", 1)], {"unique": True}),
+    ("user_organizations", [("user_id", 1), ("role", 1)], {}),
+    ("user_organizations", "organization_id", {}),
+    ("user_organizations", "role_id", {}),
+    ("roles", "name", {"unique": True}),
+    # Includes _id so organization -> fund id lookups are answered from the index alone
+    ("funds", [("organization_id", 1), ("_id", 1)], {}),
+    ("investors", "organization_id", {}),
+    ("investors", "fund_id", {}),
+    # Also serves investor_id lookups through its prefix
+    ("investor_funds", [("investor_id", 1), ("fund_id", 1)], {"unique": True}),
+    ("investor_funds", "fund_id", {}),
+    ("properties", "fund_id", {}),
+]
+
+
+async def _create_index(db, collection: str, keys, **options):
+    """Create one index, logging instead of failing when existing data prevents it (e.g. duplicates)"""
+    try:
+        await db[collection].create_index(keys, **options)
+    except OperationFailure as e:
+        logger.warning("Could not create index %s on %s: %s", keys, collection, e)
+
+
+async def ensure_indexes():
+    """Create the indexes used by hot-path queries (idempotent)"""
+    db = get_db()
+    for collection, keys, options in INDEXES:
+        await _create_index(db, collection, keys, **options)
+
+
 def close_connection():
     """Close MongoDB connection"""
     global mongo_client
@@ -27,7 +27,10 @@ if __name__ == "__main__":
     os.environ["ENV"] = ENV_MAP[args.env]
 
 from config import settings
-from database.database import init_database, close_connection
+from database.database import init_database, ensure_indexes, close_connection
+from database.cache import init_cache, close_cache
+from repositories.mongo_repository import get_repo
+from utils.responses import MongoJSONResponse
 from routes import funds, investors, properties, organizations, users, user_organizations, investor_funds, auth, swagger, roles
 
 
@@ -35,8 +38,13 @@ from routes import funds, investors, properties, organizations, users, user_orga
 async def lifespan(app: FastAPI):
     # Startup
     init_database()
+    get_repo.cache_clear()
+    if settings.MONGODB_ENSURE_INDEXES:
+        await ensure_indexes()
+    init_cache()
     yield
     # Shutdown
+    await close_cache()
     close_connection()
 
 
@@ -73,6 +81,7 @@ This API uses JWT Bearer token authentication. Obtain a token via the `/api/v1/a
     """,
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=MongoJSONResponse,
     openapi_tags=tags_metadata,
     docs_url="/docs",
     redoc_url="/redoc",
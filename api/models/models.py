@@ -8,16 +8,16 @@ from typing import Optional, TypedDict
 
 
 # Helper function to create document with timestamps
-def create_document(data: dict) -> dict:
+def create_document(data: dict, now: Optional[datetime] = None) -> dict:
     """Add timestamps to a new document"""
-    data["created_at"] = datetime.now(timezone.utc)
+    data["created_at"] = now or datetime.now(timezone.utc)
     data["updated_at"] = None
     return data
 
 
-def update_document(data: dict) -> dict:
+def update_document(data: dict, now: Optional[datetime] = None) -> dict:
     """Update timestamp on document update"""
-    data["updated_at"] = datetime.now(timezone.utc)
+    data["updated_at"] = now or datetime.now(timezone.utc)
     return data
 
 
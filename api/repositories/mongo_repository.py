@@ -1,7 +1,44 @@
-from typing import List, Optional
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional
 from bson import ObjectId
+from pymongo import ReturnDocument
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from database.database import get_db
+
+# Pipeline stages exposing _id as a string "id" field, so documents are shaped by the server
+ID_STAGES = [
+    {"$addFields": {"id": {"$toString": "$_id"}}},
+    {"$project": {"_id": 0}},
+]
+
+
+def object_id_expr(path: str) -> dict:
+    """Aggregation expression converting a string id to an ObjectId (null when missing or invalid)"""
+    return {"$convert": {"input": path, "to": "objectId", "onError": None, "onNull": None}}
+
+
+def lookup_by_id_stages(
+    local_field: str, from_collection: str, as_field: str, projection: Optional[dict] = None
+) -> List[dict]:
+    """
+    Stages joining a string id field to another collection's _id
+    Uses the let/$expr form (MongoDB 4.0+, for $convert), which still matches on the _id index; combining
+    localField/foreignField with a pipeline would need MongoDB 5.0
+    """
+    pipeline = [{"$match": {"$expr": {"$eq": ["$_id", "$$id"]}}}]
+    if projection:
+        # Only the projected fields of each joined document are carried through the pipeline
+        pipeline.append({"$project": projection})
+    return [
+        {"$lookup": {
+            "from": from_collection,
+            "let": {"id": object_id_expr(f"${local_field}")},
+            "pipeline": pipeline,
+            "as": as_field,
+        }},
+    ]
+
 
 class MongoRepository:
     """MongoDB repository implementation"""
@@ -14,61 +51,133 @@ class MongoRepository:
         data["id"] = str(result.inserted_id)
         return data
 
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[dict]:
-        cursor = self.collection.find().skip(skip).limit(limit)
-        items = []
-        async for doc in cursor:
-            doc["id"] = str(doc.pop("_id"))
-            items.append(doc)
-        return items
+    async def create_many(self, docs: List[dict]) -> List[str]:
+        """Insert documents in a single unordered batch, returning their ids"""
+        result = await self.collection.insert_many(docs, ordered=False)
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+    async def aggregate(self, pipeline: List[dict]) -> List[dict]:
+        """Run an aggregation pipeline, returning documents with a string "id" field"""
+        return await self.collection.aggregate(pipeline + ID_STAGES).to_list(length=None)
+
+    async def aggregate_raw(self, pipeline: List[dict]) -> List[dict]:
+        """Run an aggregation pipeline as-is, for pipelines that shape their own output"""
+        return await self.collection.aggregate(pipeline).to_list(length=None)
+
+    async def iter_aggregate(self, pipeline: List[dict]) -> AsyncIterator[dict]:
+        """Iterate the raw results of an aggregation pipeline, without loading them all into memory"""
+        async for doc in self.collection.aggregate(pipeline):
+            yield doc
+
+    async def get_all(
+        self, skip: int = 0, limit: int = 100, query: Optional[dict] = None, projection: Optional[dict] = None
+    ) -> List[dict]:
+        pipeline = [{"$sort": {"_id": 1}}, {"$skip": skip}]
+        if query:
+            pipeline.insert(0, {"$match": query})
+        if limit:
+            pipeline.append({"$limit": limit})
+        if projection:
+            pipeline.append({"$project": projection})
+        return await self.aggregate(pipeline)
 
     async def get_by_id(self, id: str) -> Optional[dict]:
-        try:
-            doc = await self.collection.find_one({"_id": ObjectId(id)})
-            if doc:
-                doc["id"] = str(doc.pop("_id"))
-                return doc
-            return None
-        except Exception:
+        if not ObjectId.is_valid(id):
             return None
+        doc = await self.collection.find_one({"_id": ObjectId(id)})
+        if doc:
+            doc["id"] = str(doc.pop("_id"))
+            return doc
+        return None
 
-    async def get_by_field(self, field: str, value) -> List[dict]:
-        cursor = self.collection.find({field: value})
-        items = []
-        async for doc in cursor:
+    async def find_one(self, query: dict, projection: Optional[dict] = None) -> Optional[dict]:
+        """Get the first document matching the query"""
+        doc = await self.collection.find_one(query, projection)
+        if doc:
             doc["id"] = str(doc.pop("_id"))
-            items.append(doc)
-        return items
+            return doc
+        return None
+
+    async def get_by_ids(self, ids: List[str]) -> List[dict]:
+        """Get documents for a list of ids in one query (invalid ids are skipped)"""
+        object_ids = [ObjectId(id) for id in ids if ObjectId.is_valid(id)]
+        if not object_ids:
+            return []
+        return await self.aggregate([{"$match": {"_id": {"$in": object_ids}}}])
+
+    async def find(self, query: dict, projection: Optional[dict] = None) -> List[dict]:
+        """Get raw documents matching the query, optionally projected"""
+        return await self.collection.find(query, projection).to_list(length=None)
+
+    async def get_one_by_field(self, field: str, value) -> Optional[dict]:
+        """Get the first document where field equals value"""
+        return await self.find_one({field: value})
+
+    async def get_by_field(self, field: str, value, projection: Optional[dict] = None) -> List[dict]:
+        pipeline = [{"$match": {field: value}}]
+        if projection:
+            pipeline.append({"$project": projection})
+        return await self.aggregate(pipeline)
+
+    async def iter_by_field(self, field: str, value, projection: Optional[dict] = None) -> AsyncIterator[dict]:
+        """Iterate raw documents where field equals value, without loading them all into memory"""
+        async for doc in self.collection.find({field: value}, projection):
+            yield doc
 
     async def get_by_field_in(self, field: str, values: List) -> List[dict]:
         """Get documents where field value is in the provided list"""
-        cursor = self.collection.find({field: {"$in": values}})
-        items = []
-        async for doc in cursor:
-            doc["id"] = str(doc.pop("_id"))
-            items.append(doc)
-        return items
+        return await self.aggregate([{"$match": {field: {"$in": values}}}])
 
     async def update(self, id: str, data: dict) -> Optional[dict]:
-        try:
-            # Remove None values
-            update_data = {k: v for k, v in data.items() if v is not None}
-            if not update_data:
-                return await self.get_by_id(id)
-
-            result = await self.collection.update_one(
-                {"_id": ObjectId(id)},
-                {"$set": update_data}
-            )
-            if result.modified_count > 0 or result.matched_count > 0:
-                return await self.get_by_id(id)
-            return None
-        except Exception:
+        if not ObjectId.is_valid(id):
             return None
 
+        # Remove None values
+        update_data = {k: v for k, v in data.items() if v is not None}
+        if not update_data:
+            return await self.get_by_id(id)
+
+        doc = await self.collection.find_one_and_update(
+            {"_id": ObjectId(id)},
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc:
+            doc["id"] = str(doc.pop("_id"))
+            return doc
+        return None
+
     async def delete(self, id: str) -> bool:
-        try:
-            result = await self.collection.delete_one({"_id": ObjectId(id)})
-            return result.deleted_count > 0
-        except Exception:
+        if not ObjectId.is_valid(id):
             return False
+        result = await self.collection.delete_one({"_id": ObjectId(id)})
+        return result.deleted_count > 0
+
+    async def delete_where(self, query: dict) -> bool:
+        """Delete the first document matching the query"""
+        result = await self.collection.delete_one(query)
+        return result.deleted_count > 0
+
+    async def delete_many(self, query: dict) -> int:
+        """Delete every document matching the query, returning how many were removed"""
+        result = await self.collection.delete_many(query)
+        return result.deleted_count
+
+    async def bulk_write(self, requests: List) -> int:
+        """Apply a batch of write operations in one round trip, returning how many documents changed"""
+        result = await self.collection.bulk_write(requests, ordered=False)
+        return result.modified_count
+
+    async def count(self, query: dict) -> int:
+        """Count documents matching the query"""
+        return await self.collection.count_documents(query)
+
+    async def exists(self, query: dict) -> bool:
+        """Check whether any document matches the query"""
+        return await self.collection.count_documents(query, limit=1) > 0
+
+
+@lru_cache(maxsize=None)
+def get_repo(collection_name: str) -> MongoRepository:
+    """Get the shared repository for a collection (cleared when the database is re-initialized)"""
+    return MongoRepository(collection_name, get_db())
@@ -0,0 +1,63 @@
+import re
+from typing import Dict, Optional, Tuple
+from cachetools import TTLCache
+from pymongo import UpdateMany
+
+from repositories.mongo_repository import get_repo
+
+# The roles table, indexed by id and by name. There are only a handful of roles and they rarely
+# change, so it is reloaded at most once a minute (immediately after a write to roles in this
+# process, and on a miss, since another worker may have created the role)
+_role_cache = TTLCache(maxsize=1, ttl=60)
+
+
+async def _role_table(reload: bool = False) -> Tuple[Dict[str, dict], Dict[str, dict]]:
+    table = None if reload else _role_cache.get("roles")
+    if table is None:
+        roles = await get_repo("roles").get_all(limit=0)
+        table = ({role["id"]: role for role in roles}, {role["name"]: role for role in roles})
+        _role_cache["roles"] = table
+    return table
+
+
+def invalidate_role_cache() -> None:
+    """Drop the cached roles table after roles change"""
+    _role_cache.clear()
+
+
+def _lookup(table: Tuple[Dict[str, dict], Dict[str, dict]], role_id: Optional[str], role_name: Optional[str]):
+    roles_by_id, roles_by_name = table
+    if role_id:
+        return roles_by_id.get(role_id)
+    if role_name:
+        return roles_by_name.get(role_name.lower())
+    return None
+
+
+async def resolve_role(role_id: Optional[str], role_name: Optional[str]) -> Optional[dict]:
+    """Resolve a role by id, or by name when no id is given (legacy mappings only store the name)"""
+    if not role_id and not role_name:
+        return None
+    role = _lookup(await _role_table(), role_id, role_name)
+    if role is None:
+        # The cached table may predate a role created by another worker: reload once before giving up
+        role = _lookup(await _role_table(reload=True), role_id, role_name)
+    return role
+
+
+async def backfill_role_ids() -> int:
+    """
+    Set role_id on legacy mappings that only store a role name, so they resolve by id from then on
+    Returns: number of mappings updated
+    """
+    roles_by_id, _ = await _role_table()
+    if not roles_by_id:
+        return 0
+    # One update per role (there are only a handful), sent as a single batch
+    return await get_repo("user_organizations").bulk_write([
+        UpdateMany(
+            {"role_id": {"$in": [None, ""]}, "role": {"$regex": f"^{re.escape(role['name'])}$", "$options": "i"}},
+            {"$set": {"role_id": role_id}}
+        )
+        for role_id, role in roles_by_id.items()
+    ])
@@ -1,9 +1,10 @@
+import asyncio
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from pymongo.errors import DuplicateKeyError
 
 from config import settings
-from database.database import get_db
 from schemas.schemas import (
     UserRegister,
     UserResponse,
@@ -16,30 +17,42 @@ from auth.utils import (
     verify_password,
     get_password_hash,
     create_access_token,
-    get_current_active_user
+    get_current_active_user,
+    invalidate_cached_user
 )
-from repositories.mongo_repository import MongoRepository
+from repositories.mongo_repository import get_repo
 from models.models import create_document
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# Role descriptions are static, so build the /roles payloads once
+ROLE_INFO = {
+    role.value: {
+        "role": role.value,
+        "name": role.name.replace("_", " ").title(),
+        "permissions": dict(ROLE_PERMISSIONS.get(role, {}))
+    }
+    for role in RoleEnum
+}
+ROLES_PAYLOAD = {"roles": list(ROLE_INFO.values())}
+
 
 @router.post("/register", response_model=UserResponse, status_code=201)
 async def register(user_data: UserRegister):
     """Register a new user"""
-    repo = MongoRepository("users", get_db())
-
-    # Check if email already exists
-    existing_users = await repo.get_by_field("email", user_data.email)
-    if existing_users:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
+    repo = get_repo("users")
 
-    # Check if username already exists
-    existing_users = await repo.get_by_field("username", user_data.username)
-    if existing_users:
+    # Check if email or username already exists
+    existing_user = await repo.find_one(
+        {"$or": [{"email": user_data.email}, {"username": user_data.username}]},
+        projection={"email": 1, "username": 1}
+    )
+    if existing_user:
+        if existing_user.get("email") == user_data.email:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken"
@@ -47,29 +60,36 @@ async def register(user_data: UserRegister):
 
     # Create user with hashed password
     user_dict = user_data.model_dump()
-    user_dict["hashed_password"] = get_password_hash(user_dict.pop("password"))
+    user_dict["hashed_password"] = await asyncio.to_thread(get_password_hash, user_dict.pop("password"))
     user_dict["is_active"] = True
     user_dict["is_superuser"] = False
     user_dict = create_document(user_dict)
 
-    return await repo.create(user_dict)
+    # The unique indexes catch a concurrent registration that passed the check above
+    try:
+        return await repo.create(user_dict)
+    except DuplicateKeyError as e:
+        if "email" in (e.details or {}).get("keyPattern", {}):
+            detail = "Email already registered"
+        else:
+            detail = "Username already taken"
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
 
 
 @router.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """Login and get access token"""
-    repo = MongoRepository("users", get_db())
-    users = await repo.get_by_field("username", form_data.username)
+    repo = get_repo("users")
+    user = await repo.get_one_by_field("username", form_data.username)
 
-    if not users:
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = users[0]
-    if not verify_password(form_data.password, user.get("hashed_password", "")):
+    if not await asyncio.to_thread(verify_password, form_data.password, user.get("hashed_password", "")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -84,7 +104,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.get("id"))},
+        data={"sub": user["id"]},
         expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
@@ -102,15 +122,19 @@ async def change_password(
     current_user: dict = Depends(get_current_active_user)
 ):
     """Change the current user's password"""
-    if not verify_password(password_data.current_password, current_user.get("hashed_password", "")):
+    if not await asyncio.to_thread(
+        verify_password, password_data.current_password, current_user.get("hashed_password", "")
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect current password"
         )
 
-    repo = MongoRepository("users", get_db())
-    new_hash = get_password_hash(password_data.new_password)
-    await repo.update(str(current_user.get("id")), {"hashed_password": new_hash})
+    repo = get_repo("users")
+    new_hash = await asyncio.to_thread(get_password_hash, password_data.new_password)
+    user_id = current_user["id"]
+    await repo.update(user_id, {"hashed_password": new_hash})
+    invalidate_cached_user(user_id)
 
     return {"message": "Password changed successfully"}
 
@@ -124,29 +148,16 @@ async def logout(current_user: dict = Depends(get_current_active_user)):
 @router.get("/roles")
 async def get_available_roles():
     """Get all available roles with their permissions"""
-    roles = []
-    for role in RoleEnum:
-        role_info = {
-            "role": role.value,
-            "name": role.name.replace("_", " ").title(),
-            "permissions": ROLE_PERMISSIONS.get(role, {})
-        }
-        roles.append(role_info)
-    return {"roles": roles}
+    return ROLES_PAYLOAD
 
 
 @router.get("/roles/{role_name}")
 async def get_role_permissions(role_name: str):
     """Get permissions for a specific role"""
-    try:
-        role = RoleEnum(role_name)
-        return {
-            "role": role.value,
-            "name": role.name.replace("_", " ").title(),
-            "permissions": ROLE_PERMISSIONS.get(role, {})
-        }
-    except ValueError:
+    role_info = ROLE_INFO.get(role_name)
+    if role_info is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Role '{role_name}' not found"
         )
+    return role_info
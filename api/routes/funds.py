@@ -1,23 +1,28 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, UploadFile, File, Query
 from fastapi.responses import StreamingResponse
 from typing import List, Literal
-from datetime import datetime
+from datetime import datetime, timezone
 
-from database.database import get_db
 from schemas.schemas import FundCreate, FundUpdate, FundResponse
-from repositories.mongo_repository import MongoRepository
+from repositories.mongo_repository import get_repo
+from database.cache import cached_get_by_field, invalidate_collection
 from models.models import create_document, update_document
+from utils.responses import MongoJSONResponse, ndjson_stream
 from utils.import_export import (
-    export_to_xlsx, export_to_json,
+    stream_xlsx, stream_json,
     import_from_xlsx, import_from_json,
-    validate_and_convert_row,
-    generate_template_xlsx, generate_template_json
+    validate_and_convert_row, insert_in_batches,
+    generate_template_xlsx, generate_template_json,
+    today_iso
 )
 
 router = APIRouter(prefix="/funds", tags=["Funds"])
 
 # Export fields configuration
 FUND_EXPORT_FIELDS = ['name', 'fund_type', 'target_size', 'current_size', 'currency', 'status', 'description']
+# Only the exported columns are read from MongoDB
+FUND_EXPORT_PROJECTION = {"_id": 0, **{field: 1 for field in FUND_EXPORT_FIELDS}}
 FUND_FIELD_TYPES = {
     'name': str,
     'fund_type': str,
@@ -28,10 +33,32 @@ FUND_FIELD_TYPES = {
     'description': str,
 }
 FUND_REQUIRED_FIELDS = ['name']
+# Imported columns and the value used when a column is absent
+FUND_IMPORT_DEFAULTS = {**dict.fromkeys(FUND_EXPORT_FIELDS), 'current_size': 0, 'currency': 'USD', 'status': 'active'}
 
 # Valid values for validation
-VALID_FUND_TYPES = ['real_estate', 'private_equity', 'hedge_fund', 'venture_capital', 'infrastructure']
-VALID_FUND_STATUSES = ['active', 'closed', 'fundraising']
+VALID_FUND_TYPES = frozenset({'real_estate', 'private_equity', 'hedge_fund', 'venture_capital', 'infrastructure'})
+VALID_FUND_STATUSES = frozenset({'active', 'closed', 'fundraising'})
+_FUND_TYPE_CHOICES = f"Valid types: {', '.join(sorted(VALID_FUND_TYPES))}"
+_FUND_STATUS_CHOICES = f"Valid statuses: {', '.join(sorted(VALID_FUND_STATUSES))}"
+
+
+def validate_fund_type(value):
+    if value and value not in VALID_FUND_TYPES:
+        return False, f"Invalid fund type: {value}. {_FUND_TYPE_CHOICES}"
+    return True, ""
+
+
+def validate_fund_status(value):
+    if value and value not in VALID_FUND_STATUSES:
+        return False, f"Invalid status: {value}. {_FUND_STATUS_CHOICES}"
+    return True, ""
+
+
+FUND_FIELD_VALIDATORS = {
+    'fund_type': validate_fund_type,
+    'status': validate_fund_status
+}
 
 FUND_SAMPLE_DATA = [
     {
@@ -56,27 +83,39 @@ FUND_SAMPLE_DATA = [
 
 
 def get_repository():
-    return MongoRepository("funds", get_db())
+    return get_repo("funds")
 
 
 @router.post("/", response_model=FundResponse, status_code=201)
 async def create_fund(fund: FundCreate):
     repo = get_repository()
     data = create_document(fund.model_dump())
-    return await repo.create(data)
+    created = await repo.create(data)
+    await invalidate_collection("funds")
+    return created
 
 
-@router.get("/", response_model=List[FundResponse])
-async def get_all_funds(skip: int = 0, limit: int = 100):
+@router.get("/", responses={200: {"model": List[FundResponse]}})
+async def get_all_funds(skip: int = Query(0, ge=0), limit: int = Query(100, ge=0)):
     repo = get_repository()
-    return await repo.get_all(skip, limit)
+    return MongoJSONResponse(await repo.get_all(skip, limit))
 
 
-@router.get("/organization/{organization_id}", response_model=List[FundResponse])
+@router.get("/organization/{organization_id}", responses={200: {"model": List[FundResponse]}})
 async def get_funds_by_organization(organization_id: str):
     """Get all funds for a specific organization"""
     repo = get_repository()
-    return await repo.get_by_field("organization_id", organization_id)
+    return MongoJSONResponse(await cached_get_by_field(repo, "organization_id", organization_id))
+
+
+@router.get("/organization/{organization_id}/stream", response_class=StreamingResponse)
+async def stream_funds_by_organization(organization_id: str):
+    """Stream all funds for a specific organization as newline-delimited JSON"""
+    repo = get_repository()
+    return StreamingResponse(
+        ndjson_stream(repo.iter_by_field("organization_id", organization_id)),
+        media_type="application/x-ndjson"
+    )
 
 
 @router.get("/export", response_class=StreamingResponse)
@@ -86,21 +125,18 @@ async def export_funds(
 ):
     """Export funds to XLSX or JSON file"""
     repo = get_repository()
-    funds = await repo.get_by_field("organization_id", organization_id)
-
-    timestamp = datetime.now().strftime('%Y-%m-%d')
+    rows = repo.iter_by_field("organization_id", organization_id, FUND_EXPORT_PROJECTION)
+    timestamp = today_iso()
 
     if format == "xlsx":
-        output = export_to_xlsx(funds, FUND_EXPORT_FIELDS, "Funds")
         return StreamingResponse(
-            output,
+            stream_xlsx(rows, FUND_EXPORT_FIELDS, "Funds"),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={"Content-Disposition": f"attachment; filename=funds_export_{timestamp}.xlsx"}
         )
     else:
-        output = export_to_json(funds, FUND_EXPORT_FIELDS)
         return StreamingResponse(
-            output,
+            stream_json(rows, FUND_EXPORT_FIELDS),
             media_type="application/json",
             headers={"Content-Disposition": f"attachment; filename=funds_export_{timestamp}.json"}
         )
@@ -133,44 +169,29 @@ async def import_funds(
     file: UploadFile = File(..., description="XLSX or JSON file to import")
 ):
     """Import funds from XLSX or JSON file"""
-    content = await file.read()
     filename = file.filename.lower() if file.filename else ""
 
-    # Parse file based on extension
+    # Parse file based on extension; parsing reads the spooled upload from disk, so it runs in a worker thread
     if filename.endswith('.xlsx') or filename.endswith('.xls'):
-        data, parse_errors = import_from_xlsx(content)
+        data, parse_errors = await asyncio.to_thread(import_from_xlsx, file.file)
     elif filename.endswith('.json'):
-        data, parse_errors = import_from_json(content)
+        data, parse_errors = await asyncio.to_thread(import_from_json, file.file)
     else:
         raise HTTPException(status_code=400, detail="Unsupported file format. Use .xlsx or .json")
 
     if parse_errors and not data:
         return {"success": 0, "failed": 0, "errors": parse_errors}
 
-    # Validate and import each row
+    # Validate each row, then insert the valid ones in batches
     repo = get_repository()
-    success = 0
     failed = 0
     errors = list(parse_errors)
-
-    def validate_fund_type(value):
-        if value and value not in VALID_FUND_TYPES:
-            return False, f"Invalid fund type: {value}. Valid types: {', '.join(VALID_FUND_TYPES)}"
-        return True, ""
-
-    def validate_status(value):
-        if value and value not in VALID_FUND_STATUSES:
-            return False, f"Invalid status: {value}. Valid statuses: {', '.join(VALID_FUND_STATUSES)}"
-        return True, ""
-
-    field_validators = {
-        'fund_type': validate_fund_type,
-        'status': validate_status
-    }
+    docs = []
+    now = datetime.now(timezone.utc)
 
     for idx, row in enumerate(data, 1):
         converted, row_errors = validate_and_convert_row(
-            row, idx, FUND_REQUIRED_FIELDS, FUND_FIELD_TYPES, field_validators
+            row, idx, FUND_REQUIRED_FIELDS, FUND_FIELD_TYPES, FUND_FIELD_VALIDATORS
         )
 
         if row_errors:
@@ -178,24 +199,16 @@ async def import_funds(
             failed += 1
             continue
 
-        try:
-            fund_data = {
-                'name': converted.get('name'),
-                'fund_type': converted.get('fund_type'),
-                'target_size': converted.get('target_size'),
-                'current_size': converted.get('current_size', 0),
-                'currency': converted.get('currency', 'USD'),
-                'status': converted.get('status', 'active'),
-                'description': converted.get('description'),
-                'organization_id': organization_id
-            }
-            doc = create_document(fund_data)
-            await repo.create(doc)
-            success += 1
-        except Exception as e:
-            failed += 1
-            errors.append(f"Row {idx}: Failed to create fund - {str(e)}")
+        fund_data = {field: converted.get(field, default) for field, default in FUND_IMPORT_DEFAULTS.items()}
+        fund_data['organization_id'] = organization_id
+        docs.append((idx, create_document(fund_data, now)))
+
+    success, insert_failed, insert_errors = await insert_in_batches(repo, docs, "fund")
+    failed += insert_failed
+    errors.extend(insert_errors)
 
+    if success:
+        await invalidate_collection("funds")
     return {"success": success, "failed": failed, "errors": errors}
 
 
@@ -211,10 +224,11 @@ async def get_fund(fund_id: str):
 @router.put("/{fund_id}", response_model=FundResponse)
 async def update_fund(fund_id: str, fund_update: FundUpdate):
     repo = get_repository()
-    update_data = update_document(fund_update.model_dump(exclude_unset=True))
+    update_data = update_document(fund_update.model_dump(exclude_unset=True, exclude_none=True))
     fund = await repo.update(fund_id, update_data)
     if not fund:
         raise HTTPException(status_code=404, detail="Fund not found")
+    await invalidate_collection("funds")
     return fund
 
 
@@ -224,4 +238,5 @@ async def delete_fund(fund_id: str):
     deleted = await repo.delete(fund_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Fund not found")
+    await invalidate_collection("funds")
     return None
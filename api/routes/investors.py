@@ -1,17 +1,20 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, UploadFile, File, Query
 from fastapi.responses import StreamingResponse
 from typing import List, Literal
-from datetime import datetime
+from datetime import datetime, timezone
 
-from database.database import get_db
 from schemas.schemas import InvestorCreate, InvestorUpdate, InvestorResponse
-from repositories.mongo_repository import MongoRepository
+from repositories.mongo_repository import get_repo
+from database.cache import cached_get_by_field, invalidate_collection
 from models.models import create_document, update_document
+from utils.responses import MongoJSONResponse, ndjson_stream
 from utils.import_export import (
-    export_to_xlsx, export_to_json,
+    stream_xlsx, stream_json,
     import_from_xlsx, import_from_json,
-    validate_and_convert_row,
-    generate_template_xlsx, generate_template_json
+    validate_and_convert_row, insert_in_batches,
+    generate_template_xlsx, generate_template_json,
+    today_iso
 )
 
 router = APIRouter(prefix="/investors", tags=["Investors"])
@@ -21,6 +24,8 @@ INVESTOR_EXPORT_FIELDS = [
     'name', 'email', 'phone', 'investor_type', 'commitment_amount', 'funded_amount',
     'address', 'city', 'state', 'country', 'status', 'is_active'
 ]
+# Only the exported columns are read from MongoDB
+INVESTOR_EXPORT_PROJECTION = {"_id": 0, **{field: 1 for field in INVESTOR_EXPORT_FIELDS}}
 INVESTOR_FIELD_TYPES = {
     'name': str,
     'email': str,
@@ -36,10 +41,32 @@ INVESTOR_FIELD_TYPES = {
     'is_active': bool,
 }
 INVESTOR_REQUIRED_FIELDS = ['name']
+# Imported columns and the value used when a column is absent
+INVESTOR_IMPORT_DEFAULTS = {**dict.fromkeys(INVESTOR_EXPORT_FIELDS), 'funded_amount': 0, 'status': 'active', 'is_active': True}
 
 # Valid values for validation
-VALID_INVESTOR_TYPES = ['institutional', 'individual', 'family_office', 'pension_fund', 'endowment', 'sovereign_wealth']
-VALID_INVESTOR_STATUSES = ['active', 'inactive', 'pending']
+VALID_INVESTOR_TYPES = frozenset({'institutional', 'individual', 'family_office', 'pension_fund', 'endowment', 'sovereign_wealth'})
+VALID_INVESTOR_STATUSES = frozenset({'active', 'inactive', 'pending'})
+_INVESTOR_TYPE_CHOICES = f"Valid types: {', '.join(sorted(VALID_INVESTOR_TYPES))}"
+_INVESTOR_STATUS_CHOICES = f"Valid statuses: {', '.join(sorted(VALID_INVESTOR_STATUSES))}"
+
+
+def validate_investor_type(value):
+    if value and value not in VALID_INVESTOR_TYPES:
+        return False, f"Invalid investor type: {value}. {_INVESTOR_TYPE_CHOICES}"
+    return True, ""
+
+
+def validate_investor_status(value):
+    if value and value not in VALID_INVESTOR_STATUSES:
+        return False, f"Invalid status: {value}. {_INVESTOR_STATUS_CHOICES}"
+    return True, ""
+
+
+INVESTOR_FIELD_VALIDATORS = {
+    'investor_type': validate_investor_type,
+    'status': validate_investor_status
+}
 
 INVESTOR_SAMPLE_DATA = [
     {
@@ -74,33 +101,45 @@ INVESTOR_SAMPLE_DATA = [
 
 
 def get_repository():
-    return MongoRepository("investors", get_db())
+    return get_repo("investors")
 
 
 @router.post("/", response_model=InvestorResponse, status_code=201)
 async def create_investor(investor: InvestorCreate):
     repo = get_repository()
     data = create_document(investor.model_dump())
-    return await repo.create(data)
+    created = await repo.create(data)
+    await invalidate_collection("investors")
+    return created
 
 
-@router.get("/", response_model=List[InvestorResponse])
-async def get_all_investors(skip: int = 0, limit: int = 100):
+@router.get("/", responses={200: {"model": List[InvestorResponse]}})
+async def get_all_investors(skip: int = Query(0, ge=0), limit: int = Query(100, ge=0)):
     repo = get_repository()
-    return await repo.get_all(skip, limit)
+    return MongoJSONResponse(await repo.get_all(skip, limit))
 
 
-@router.get("/fund/{fund_id}", response_model=List[InvestorResponse])
+@router.get("/fund/{fund_id}", responses={200: {"model": List[InvestorResponse]}})
 async def get_investors_by_fund(fund_id: str):
     repo = get_repository()
-    return await repo.get_by_field("fund_id", fund_id)
+    return MongoJSONResponse(await repo.get_by_field("fund_id", fund_id))
 
 
-@router.get("/organization/{organization_id}", response_model=List[InvestorResponse])
+@router.get("/organization/{organization_id}", responses={200: {"model": List[InvestorResponse]}})
 async def get_investors_by_organization(organization_id: str):
     """Get all investors belonging to a specific organization"""
     repo = get_repository()
-    return await repo.get_by_field("organization_id", organization_id)
+    return MongoJSONResponse(await cached_get_by_field(repo, "organization_id", organization_id))
+
+
+@router.get("/organization/{organization_id}/stream", response_class=StreamingResponse)
+async def stream_investors_by_organization(organization_id: str):
+    """Stream all investors for a specific organization as newline-delimited JSON"""
+    repo = get_repository()
+    return StreamingResponse(
+        ndjson_stream(repo.iter_by_field("organization_id", organization_id)),
+        media_type="application/x-ndjson"
+    )
 
 
 @router.get("/export", response_class=StreamingResponse)
@@ -110,21 +149,18 @@ async def export_investors(
 ):
     """Export investors to XLSX or JSON file"""
     repo = get_repository()
-    investors = await repo.get_by_field("organization_id", organization_id)
-
-    timestamp = datetime.now().strftime('%Y-%m-%d')
+    rows = repo.iter_by_field("organization_id", organization_id, INVESTOR_EXPORT_PROJECTION)
+    timestamp = today_iso()
 
     if format == "xlsx":
-        output = export_to_xlsx(investors, INVESTOR_EXPORT_FIELDS, "Investors")
         return StreamingResponse(
-            output,
+            stream_xlsx(rows, INVESTOR_EXPORT_FIELDS, "Investors"),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={"Content-Disposition": f"attachment; filename=investors_export_{timestamp}.xlsx"}
         )
     else:
-        output = export_to_json(investors, INVESTOR_EXPORT_FIELDS)
         return StreamingResponse(
-            output,
+            stream_json(rows, INVESTOR_EXPORT_FIELDS),
             media_type="application/json",
             headers={"Content-Disposition": f"attachment; filename=investors_export_{timestamp}.json"}
         )
@@ -157,44 +193,29 @@ async def import_investors(
     file: UploadFile = File(..., description="XLSX or JSON file to import")
 ):
     """Import investors from XLSX or JSON file"""
-    content = await file.read()
     filename = file.filename.lower() if file.filename else ""
 
-    # Parse file based on extension
+    # Parse file based on extension; parsing reads the spooled upload from disk, so it runs in a worker thread
     if filename.endswith('.xlsx') or filename.endswith('.xls'):
-        data, parse_errors = import_from_xlsx(content)
+        data, parse_errors = await asyncio.to_thread(import_from_xlsx, file.file)
     elif filename.endswith('.json'):
-        data, parse_errors = import_from_json(content)
+        data, parse_errors = await asyncio.to_thread(import_from_json, file.file)
     else:
         raise HTTPException(status_code=400, detail="Unsupported file format. Use .xlsx or .json")
 
     if parse_errors and not data:
         return {"success": 0, "failed": 0, "errors": parse_errors}
 
-    # Validate and import each row
+    # Validate each row, then insert the valid ones in batches
     repo = get_repository()
-    success = 0
     failed = 0
     errors = list(parse_errors)
-
-    def validate_investor_type(value):
-        if value and value not in VALID_INVESTOR_TYPES:
-            return False, f"Invalid investor type: {value}. Valid types: {', '.join(VALID_INVESTOR_TYPES)}"
-        return True, ""
-
-    def validate_status(value):
-        if value and value not in VALID_INVESTOR_STATUSES:
-            return False, f"Invalid status: {value}. Valid statuses: {', '.join(VALID_INVESTOR_STATUSES)}"
-        return True, ""
-
-    field_validators = {
-        'investor_type': validate_investor_type,
-        'status': validate_status
-    }
+    docs = []
+    now = datetime.now(timezone.utc)
 
     for idx, row in enumerate(data, 1):
         converted, row_errors = validate_and_convert_row(
-            row, idx, INVESTOR_REQUIRED_FIELDS, INVESTOR_FIELD_TYPES, field_validators
+            row, idx, INVESTOR_REQUIRED_FIELDS, INVESTOR_FIELD_TYPES, INVESTOR_FIELD_VALIDATORS
         )
 
         if row_errors:
@@ -202,29 +223,16 @@ async def import_investors(
             failed += 1
             continue
 
-        try:
-            investor_data = {
-                'name': converted.get('name'),
-                'email': converted.get('email'),
-                'phone': converted.get('phone'),
-                'investor_type': converted.get('investor_type'),
-                'commitment_amount': converted.get('commitment_amount'),
-                'funded_amount': converted.get('funded_amount', 0),
-                'address': converted.get('address'),
-                'city': converted.get('city'),
-                'state': converted.get('state'),
-                'country': converted.get('country'),
-                'status': converted.get('status', 'active'),
-                'is_active': converted.get('is_active', True),
-                'organization_id': organization_id
-            }
-            doc = create_document(investor_data)
-            await repo.create(doc)
-            success += 1
-        except Exception as e:
-            failed += 1
-            errors.append(f"Row {idx}: Failed to create investor - {str(e)}")
+        investor_data = {field: converted.get(field, default) for field, default in INVESTOR_IMPORT_DEFAULTS.items()}
+        investor_data['organization_id'] = organization_id
+        docs.append((idx, create_document(investor_data, now)))
+
+    success, insert_failed, insert_errors = await insert_in_batches(repo, docs, "investor")
+    failed += insert_failed
+    errors.extend(insert_errors)
 
+    if success:
+        await invalidate_collection("investors")
     return {"success": success, "failed": failed, "errors": errors}
 
 
@@ -240,10 +248,11 @@ async def get_investor(investor_id: str):
 @router.put("/{investor_id}", response_model=InvestorResponse)
 async def update_investor(investor_id: str, investor_update: InvestorUpdate):
     repo = get_repository()
-    update_data = update_document(investor_update.model_dump(exclude_unset=True))
+    update_data = update_document(investor_update.model_dump(exclude_unset=True, exclude_none=True))
     investor = await repo.update(investor_id, update_data)
     if not investor:
         raise HTTPException(status_code=404, detail="Investor not found")
+    await invalidate_collection("investors")
     return investor
 
 
@@ -253,4 +262,5 @@ async def delete_investor(investor_id: str):
     deleted = await repo.delete(investor_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Investor not found")
+    await invalidate_collection("investors")
     return None
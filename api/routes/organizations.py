@@ -1,16 +1,18 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
 from typing import List
 
-from database.database import get_db
 from schemas.schemas import OrganizationCreate, OrganizationUpdate, OrganizationResponse, OrganizationWithFunds
-from repositories.mongo_repository import MongoRepository
+from repositories.mongo_repository import get_repo
+from database.cache import cached_get_by_field
 from models.models import create_document, update_document
+from utils.responses import MongoJSONResponse
 
 router = APIRouter(prefix="/organizations", tags=["Organizations"])
 
 
 def get_repository():
-    return MongoRepository("organizations", get_db())
+    return get_repo("organizations")
 
 
 @router.post("/", response_model=OrganizationResponse, status_code=201)
@@ -20,10 +22,10 @@ async def create_organization(organization: OrganizationCreate):
     return await repo.create(data)
 
 
-@router.get("/", response_model=List[OrganizationResponse])
-async def get_all_organizations(skip: int = 0, limit: int = 100):
+@router.get("/", responses={200: {"model": List[OrganizationResponse]}})
+async def get_all_organizations(skip: int = Query(0, ge=0), limit: int = Query(100, ge=0)):
     repo = get_repository()
-    return await repo.get_all(skip, limit)
+    return MongoJSONResponse(await repo.get_all(skip, limit))
 
 
 @router.get("/{organization_id}", response_model=OrganizationResponse)
@@ -38,13 +40,14 @@ async def get_organization(organization_id: str):
 @router.get("/{organization_id}/funds", response_model=OrganizationWithFunds)
 async def get_organization_with_funds(organization_id: str):
     """Get organization with all its funds"""
-    orgs_repo = get_repository()
-    org = await orgs_repo.get_by_id(organization_id)
+    # The fund query does not depend on the organization, so run both concurrently
+    org, funds = await asyncio.gather(
+        get_repository().get_by_id(organization_id),
+        cached_get_by_field(get_repo("funds"), "organization_id", organization_id)
+    )
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
 
-    funds_repo = MongoRepository("funds", get_db())
-    funds = await funds_repo.get_by_field("organization_id", organization_id)
     org["funds"] = funds
     return org
 
@@ -52,7 +55,7 @@ async def get_organization_with_funds(organization_id: str):
 @router.put("/{organization_id}", response_model=OrganizationResponse)
 async def update_organization(organization_id: str, organization_update: OrganizationUpdate):
     repo = get_repository()
-    update_data = update_document(organization_update.model_dump(exclude_unset=True))
+    update_data = update_document(organization_update.model_dump(exclude_unset=True, exclude_none=True))
     organization = await repo.update(organization_id, update_data)
     if not organization:
         raise HTTPException(status_code=404, detail="Organization not found")
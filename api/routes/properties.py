@@ -1,17 +1,19 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, UploadFile, File, Query
 from fastapi.responses import StreamingResponse
-from typing import List, Literal
-from datetime import datetime
+from typing import List, Literal, Optional
+from datetime import datetime, timezone
 
-from database.database import get_db
 from schemas.schemas import PropertyCreate, PropertyUpdate, PropertyResponse
-from repositories.mongo_repository import MongoRepository
+from repositories.mongo_repository import get_repo
 from models.models import create_document, update_document
+from utils.responses import MongoJSONResponse
 from utils.import_export import (
-    export_to_xlsx, export_to_json,
+    stream_xlsx, stream_json,
     import_from_xlsx, import_from_json,
-    validate_and_convert_row,
-    generate_template_xlsx, generate_template_json
+    validate_and_convert_row, insert_in_batches,
+    generate_template_xlsx, generate_template_json,
+    today_iso
 )
 
 router = APIRouter(prefix="/properties", tags=["Properties"])
@@ -22,6 +24,8 @@ PROPERTY_EXPORT_FIELDS = [
     'acquisition_price', 'current_value', 'acquisition_date', 'status',
     'square_footage', 'description'
 ]
+# Only the exported columns are read from MongoDB
+PROPERTY_EXPORT_PROJECTION = {"_id": 0, **{field: 1 for field in PROPERTY_EXPORT_FIELDS}}
 PROPERTY_FIELD_TYPES = {
     'name': str,
     'address': str,
@@ -37,10 +41,32 @@ PROPERTY_FIELD_TYPES = {
     'description': str,
 }
 PROPERTY_REQUIRED_FIELDS = ['name']
+# Imported columns and the value used when a column is absent
+PROPERTY_IMPORT_DEFAULTS = {**dict.fromkeys(PROPERTY_EXPORT_FIELDS), 'property_type': 'multifamily', 'status': 'active'}
 
 # Valid values for validation
-VALID_PROPERTY_TYPES = ['multifamily', 'office', 'retail', 'industrial', 'mixed_use', 'land', 'hotel', 'self_storage', 'senior_living', 'student_housing']
-VALID_PROPERTY_STATUSES = ['active', 'pending', 'under_contract', 'sold']
+VALID_PROPERTY_TYPES = frozenset({'multifamily', 'office', 'retail', 'industrial', 'mixed_use', 'land', 'hotel', 'self_storage', 'senior_living', 'student_housing'})
+VALID_PROPERTY_STATUSES = frozenset({'active', 'pending', 'under_contract', 'sold'})
+_PROPERTY_TYPE_CHOICES = f"Valid types: {', '.join(sorted(VALID_PROPERTY_TYPES))}"
+_PROPERTY_STATUS_CHOICES = f"Valid statuses: {', '.join(sorted(VALID_PROPERTY_STATUSES))}"
+
+
+def validate_property_type(value):
+    if value and value not in VALID_PROPERTY_TYPES:
+        return False, f"Invalid property type: {value}. {_PROPERTY_TYPE_CHOICES}"
+    return True, ""
+
+
+def validate_property_status(value):
+    if value and value not in VALID_PROPERTY_STATUSES:
+        return False, f"Invalid status: {value}. {_PROPERTY_STATUS_CHOICES}"
+    return True, ""
+
+
+PROPERTY_FIELD_VALIDATORS = {
+    'property_type': validate_property_type,
+    'status': validate_property_status
+}
 
 PROPERTY_SAMPLE_DATA = [
     {
@@ -75,7 +101,26 @@ PROPERTY_SAMPLE_DATA = [
 
 
 def get_repository():
-    return MongoRepository("properties", get_db())
+    return get_repo("properties")
+
+
+def organization_properties_pipeline(organization_id: str, projection: Optional[dict] = None) -> List[dict]:
+    """Pipeline on funds that joins in the properties of every fund in an organization"""
+    pipeline = [
+        {"$match": {"organization_id": organization_id}},
+        {"$project": {"_id": 0, "fund_id": {"$toString": "$_id"}}},
+        {"$lookup": {
+            "from": "properties",
+            "localField": "fund_id",
+            "foreignField": "fund_id",
+            "as": "property"
+        }},
+        {"$unwind": "$property"},
+        {"$replaceRoot": {"newRoot": "$property"}},
+    ]
+    if projection:
+        pipeline.append({"$project": projection})
+    return pipeline
 
 
 @router.post("/", response_model=PropertyResponse, status_code=201)
@@ -85,34 +130,23 @@ async def create_property(property_data: PropertyCreate):
     return await repo.create(data)
 
 
-@router.get("/", response_model=List[PropertyResponse])
-async def get_all_properties(skip: int = 0, limit: int = 100):
+@router.get("/", responses={200: {"model": List[PropertyResponse]}})
+async def get_all_properties(skip: int = Query(0, ge=0), limit: int = Query(100, ge=0)):
     repo = get_repository()
-    return await repo.get_all(skip, limit)
+    return MongoJSONResponse(await repo.get_all(skip, limit))
 
 
-@router.get("/fund/{fund_id}", response_model=List[PropertyResponse])
+@router.get("/fund/{fund_id}", responses={200: {"model": List[PropertyResponse]}})
 async def get_properties_by_fund(fund_id: str):
     repo = get_repository()
-    return await repo.get_by_field("fund_id", fund_id)
+    return MongoJSONResponse(await repo.get_by_field("fund_id", fund_id))
 
 
-@router.get("/organization/{organization_id}", response_model=List[PropertyResponse])
+@router.get("/organization/{organization_id}", responses={200: {"model": List[PropertyResponse]}})
 async def get_properties_by_organization(organization_id: str):
     """Get all properties for funds belonging to a specific organization"""
-    db = get_db()
-
-    # First get all funds for this organization
-    funds_repo = MongoRepository("funds", db)
-    funds = await funds_repo.get_by_field("organization_id", organization_id)
-    fund_ids = [fund["id"] for fund in funds]
-
-    if not fund_ids:
-        return []
-
-    # Get all properties for these funds
-    repo = get_repository()
-    return await repo.get_by_field_in("fund_id", fund_ids)
+    funds_repo = get_repo("funds")
+    return MongoJSONResponse(await funds_repo.aggregate(organization_properties_pipeline(organization_id)))
 
 
 @router.get("/export", response_class=StreamingResponse)
@@ -121,32 +155,21 @@ async def export_properties(
     format: Literal["xlsx", "json"] = Query("xlsx", description="Export format")
 ):
     """Export properties to XLSX or JSON file"""
-    db = get_db()
-
-    # First get all funds for this organization
-    funds_repo = MongoRepository("funds", db)
-    funds = await funds_repo.get_by_field("organization_id", organization_id)
-    fund_ids = [fund["id"] for fund in funds]
-
-    if not fund_ids:
-        properties = []
-    else:
-        repo = get_repository()
-        properties = await repo.get_by_field_in("fund_id", fund_ids)
-
-    timestamp = datetime.now().strftime('%Y-%m-%d')
+    funds_repo = get_repo("funds")
+    rows = funds_repo.iter_aggregate(
+        organization_properties_pipeline(organization_id, PROPERTY_EXPORT_PROJECTION)
+    )
+    timestamp = today_iso()
 
     if format == "xlsx":
-        output = export_to_xlsx(properties, PROPERTY_EXPORT_FIELDS, "Properties")
         return StreamingResponse(
-            output,
+            stream_xlsx(rows, PROPERTY_EXPORT_FIELDS, "Properties"),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={"Content-Disposition": f"attachment; filename=properties_export_{timestamp}.xlsx"}
         )
     else:
-        output = export_to_json(properties, PROPERTY_EXPORT_FIELDS)
         return StreamingResponse(
-            output,
+            stream_json(rows, PROPERTY_EXPORT_FIELDS),
             media_type="application/json",
             headers={"Content-Disposition": f"attachment; filename=properties_export_{timestamp}.json"}
         )
@@ -179,44 +202,29 @@ async def import_properties(
     file: UploadFile = File(..., description="XLSX or JSON file to import")
 ):
     """Import properties from XLSX or JSON file"""
-    content = await file.read()
     filename = file.filename.lower() if file.filename else ""
 
-    # Parse file based on extension
+    # Parse file based on extension; parsing reads the spooled upload from disk, so it runs in a worker thread
     if filename.endswith('.xlsx') or filename.endswith('.xls'):
-        data, parse_errors = import_from_xlsx(content)
+        data, parse_errors = await asyncio.to_thread(import_from_xlsx, file.file)
     elif filename.endswith('.json'):
-        data, parse_errors = import_from_json(content)
+        data, parse_errors = await asyncio.to_thread(import_from_json, file.file)
     else:
         raise HTTPException(status_code=400, detail="Unsupported file format. Use .xlsx or .json")
 
     if parse_errors and not data:
         return {"success": 0, "failed": 0, "errors": parse_errors}
 
-    # Validate and import each row
+    # Validate each row, then insert the valid ones in batches
     repo = get_repository()
-    success = 0
     failed = 0
     errors = list(parse_errors)
-
-    def validate_property_type(value):
-        if value and value not in VALID_PROPERTY_TYPES:
-            return False, f"Invalid property type: {value}. Valid types: {', '.join(VALID_PROPERTY_TYPES)}"
-        return True, ""
-
-    def validate_status(value):
-        if value and value not in VALID_PROPERTY_STATUSES:
-            return False, f"Invalid status: {value}. Valid statuses: {', '.join(VALID_PROPERTY_STATUSES)}"
-        return True, ""
-
-    field_validators = {
-        'property_type': validate_property_type,
-        'status': validate_status
-    }
+    docs = []
+    now = datetime.now(timezone.utc)
 
     for idx, row in enumerate(data, 1):
         converted, row_errors = validate_and_convert_row(
-            row, idx, PROPERTY_REQUIRED_FIELDS, PROPERTY_FIELD_TYPES, field_validators
+            row, idx, PROPERTY_REQUIRED_FIELDS, PROPERTY_FIELD_TYPES, PROPERTY_FIELD_VALIDATORS
         )
 
         if row_errors:
@@ -224,28 +232,13 @@ async def import_properties(
             failed += 1
             continue
 
-        try:
-            property_data = {
-                'name': converted.get('name'),
-                'address': converted.get('address'),
-                'city': converted.get('city'),
-                'state': converted.get('state'),
-                'country': converted.get('country'),
-                'property_type': converted.get('property_type', 'multifamily'),
-                'acquisition_price': converted.get('acquisition_price'),
-                'current_value': converted.get('current_value'),
-                'acquisition_date': converted.get('acquisition_date'),
-                'status': converted.get('status', 'active'),
-                'square_footage': converted.get('square_footage'),
-                'description': converted.get('description'),
-                'fund_id': fund_id
-            }
-            doc = create_document(property_data)
-            await repo.create(doc)
-            success += 1
-        except Exception as e:
-            failed += 1
-            errors.append(f"Row {idx}: Failed to create property - {str(e)}")
+        property_data = {field: converted.get(field, default) for field, default in PROPERTY_IMPORT_DEFAULTS.items()}
+        property_data['fund_id'] = fund_id
+        docs.append((idx, create_document(property_data, now)))
+
+    success, insert_failed, insert_errors = await insert_in_batches(repo, docs, "property")
+    failed += insert_failed
+    errors.extend(insert_errors)
 
     return {"success": success, "failed": failed, "errors": errors}
 
@@ -262,7 +255,7 @@ async def get_property(property_id: str):
 @router.put("/{property_id}", response_model=PropertyResponse)
 async def update_property(property_id: str, property_update: PropertyUpdate):
     repo = get_repository()
-    update_data = update_document(property_update.model_dump(exclude_unset=True))
+    update_data = update_document(property_update.model_dump(exclude_unset=True, exclude_none=True))
     property_doc = await repo.update(property_id, update_data)
     if not property_doc:
         raise HTTPException(status_code=404, detail="Property not found")
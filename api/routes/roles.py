@@ -1,21 +1,23 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
 from typing import List
 from datetime import datetime, timezone
 
-from database.database import get_db
 from schemas.schemas import (
     RoleCreate,
     RoleUpdate,
     RoleResponse,
 )
-from repositories.mongo_repository import MongoRepository
+from repositories.mongo_repository import get_repo
+from repositories.role_repository import invalidate_role_cache, backfill_role_ids
 from models.models import create_document, update_document
+from utils.responses import MongoJSONResponse
 
 router = APIRouter(prefix="/roles", tags=["Roles"])
 
 
 def get_repository():
-    return MongoRepository("roles", get_db())
+    return get_repo("roles")
 
 
 # Default system roles
@@ -87,19 +89,31 @@ DEFAULT_ROLES = [
 ]
 
 
+DEFAULT_ROLE_NAMES = [role["name"] for role in DEFAULT_ROLES]
+
+
 @router.post("/seed", response_model=List[RoleResponse])
 async def seed_default_roles():
     """Seed default system roles (run once during initial setup)"""
     repo = get_repository()
-    created_roles = []
 
-    for role_data in DEFAULT_ROLES:
-        # Check if role already exists
-        existing = await repo.get_by_field("name", role_data["name"])
-        if not existing:
-            data = create_document(role_data.copy())
-            created = await repo.create(data)
-            created_roles.append(created)
+    # Find which default roles already exist in one query, then insert the rest in one batch
+    existing = await repo.find({"name": {"$in": DEFAULT_ROLE_NAMES}}, {"name": 1})
+    existing_names = {role["name"] for role in existing}
+    now = datetime.now(timezone.utc)
+    created_roles = [
+        create_document(role_data.copy(), now)
+        for role_data in DEFAULT_ROLES
+        if role_data["name"] not in existing_names
+    ]
+    if created_roles:
+        ids = await repo.create_many(created_roles)
+        invalidate_role_cache()
+        for role, role_id in zip(created_roles, ids):
+            role.pop("_id", None)
+            role["id"] = role_id
+        # Link mappings that predate the roles collection to their role by id
+        await backfill_role_ids()
 
     return created_roles
 
@@ -116,19 +130,18 @@ async def create_role(role: RoleCreate):
 
     data = role.model_dump()
     data = create_document(data)
-    return await repo.create(data)
+    created = await repo.create(data)
+    invalidate_role_cache()
+    return created
 
 
-@router.get("/", response_model=List[RoleResponse])
-async def get_all_roles(skip: int = 0, limit: int = 100, active_only: bool = False):
+@router.get("/", responses={200: {"model": List[RoleResponse]}})
+async def get_all_roles(skip: int = Query(0, ge=0), limit: int = Query(100, ge=0), active_only: bool = False):
     """Get all roles"""
     repo = get_repository()
-    roles = await repo.get_all(skip, limit)
-
-    if active_only:
-        roles = [r for r in roles if r.get("is_active", True)]
-
-    return roles
+    # Roles without an is_active flag count as active
+    query = {"is_active": {"$ne": False}} if active_only else None
+    return MongoJSONResponse(await repo.get_all(skip, limit, query))
 
 
 @router.get("/{role_id}", response_model=RoleResponse)
@@ -165,8 +178,9 @@ async def update_role(role_id: str, role_update: RoleUpdate):
     if existing.get("is_system") and role_update.name:
         raise HTTPException(status_code=400, detail="Cannot change name of system roles")
 
-    update_data = update_document(role_update.model_dump(exclude_unset=True))
+    update_data = update_document(role_update.model_dump(exclude_unset=True, exclude_none=True))
     role = await repo.update(role_id, update_data)
+    invalidate_role_cache()
     return role
 
 
@@ -175,8 +189,11 @@ async def delete_role(role_id: str):
     """Delete a role (system roles cannot be deleted)"""
     repo = get_repository()
 
-    # Check if role exists
-    existing = await repo.get_by_id(role_id)
+    # Look up the role and count its assignments concurrently
+    existing, assigned_count = await asyncio.gather(
+        repo.get_by_id(role_id),
+        get_repo("user_organizations").count({"role_id": role_id})
+    )
     if not existing:
         raise HTTPException(status_code=404, detail="Role not found")
 
@@ -185,16 +202,14 @@ async def delete_role(role_id: str):
         raise HTTPException(status_code=400, detail="Cannot delete system roles")
 
     # Check if role is in use
-    db = get_db()
-    user_orgs_repo = MongoRepository("user_organizations", db)
-    users_with_role = await user_orgs_repo.get_by_field("role_id", role_id)
-    if users_with_role:
+    if assigned_count:
         raise HTTPException(
             status_code=400,
-            detail=f"Cannot delete role - it is assigned to {len(users_with_role)} user(s)"
+            detail=f"Cannot delete role - it is assigned to {assigned_count} user(s)"
         )
 
     deleted = await repo.delete(role_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Role not found")
+    invalidate_role_cache()
     return None
@@ -4,31 +4,38 @@ from fastapi.responses import HTMLResponse
 
 router = APIRouter(prefix="/swagger", tags=["Documentation"])
 
+# The documentation pages are static per deploy, so render them once at import
+SWAGGER_UI_HTML = get_swagger_ui_html(
+    openapi_url="/openapi.json",
+    title="Fund Ops Admin API - Swagger UI",
+    swagger_favicon_url="https://fastapi.tiangolo.com/img/favicon.png",
+    swagger_ui_parameters={
+        "defaultModelsExpandDepth": -1,
+        "docExpansion": "list",
+        "filter": True,
+        "tryItOutEnabled": True,
+    }
+).body
+
+REDOC_HTML = get_redoc_html(
+    openapi_url="/openapi.json",
+    title="Fund Ops Admin API - ReDoc",
+    redoc_favicon_url="https://fastapi.tiangolo.com/img/favicon.png",
+).body
+
+DOCS_CACHE_HEADERS = {"Cache-Control": "public, max-age=3600"}
+
 
 @router.get("", response_class=HTMLResponse, include_in_schema=False)
 async def swagger_ui():
     """Custom Swagger UI endpoint."""
-    return get_swagger_ui_html(
-        openapi_url="/openapi.json",
-        title="Fund Ops Admin API - Swagger UI",
-        swagger_favicon_url="https://fastapi.tiangolo.com/img/favicon.png",
-        swagger_ui_parameters={
-            "defaultModelsExpandDepth": -1,
-            "docExpansion": "list",
-            "filter": True,
-            "tryItOutEnabled": True,
-        }
-    )
+    return HTMLResponse(content=SWAGGER_UI_HTML, headers=DOCS_CACHE_HEADERS)
 
 
 @router.get("/redoc", response_class=HTMLResponse, include_in_schema=False)
 async def redoc_ui():
     """ReDoc documentation endpoint."""
-    return get_redoc_html(
-        openapi_url="/openapi.json",
-        title="Fund Ops Admin API - ReDoc",
-        redoc_favicon_url="https://fastapi.tiangolo.com/img/favicon.png",
-    )
+    return HTMLResponse(content=REDOC_HTML, headers=DOCS_CACHE_HEADERS)
 
 
 @router.get("/info")
@@ -1,158 +1,172 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 from datetime import datetime, timezone
+from pymongo.errors import DuplicateKeyError
 
-from database.database import get_db
 from schemas.schemas import (
     UserOrganizationCreate,
     UserOrganizationUpdate,
     UserOrganizationResponse,
     OrganizationWithUsers
 )
-from repositories.mongo_repository import MongoRepository
+from repositories.mongo_repository import get_repo, object_id_expr, lookup_by_id_stages
+from repositories.role_repository import resolve_role
 from models.models import create_document, update_document
+from routes.users import USER_RESPONSE_PROJECTION
+from utils.responses import MongoJSONResponse
 
 router = APIRouter(prefix="/user-organizations", tags=["User-Organization Mappings"])
 
 
 def get_repository():
-    return MongoRepository("user_organizations", get_db())
-
-
-async def get_role_by_id(role_id: str) -> Optional[dict]:
-    """Get role by ID"""
-    db = get_db()
-    roles_repo = MongoRepository("roles", db)
-    return await roles_repo.get_by_id(role_id)
-
+    return get_repo("user_organizations")
+
+
+# Aggregation stages resolving each mapping's role in the same query (by role_id, or by name for legacy rows)
+ROLE_LOOKUP_STAGES = [
+    {"$addFields": {
+        "_role_oid": object_id_expr("$role_id"),
+        "_role_key": {"$toLower": "$role"},
+    }},
+    {"$lookup": {"from": "roles", "localField": "_role_oid", "foreignField": "_id", "as": "_role_by_id"}},
+    {"$lookup": {"from": "roles", "localField": "_role_key", "foreignField": "name", "as": "_role_by_name"}},
+    {"$addFields": {"_role": {"$arrayElemAt": [
+        {"$cond": [{"$eq": [{"$ifNull": ["$role_id", ""]}, ""]}, "$_role_by_name", "$_role_by_id"]}, 0
+    ]}}},
+    {"$addFields": {
+        "role_id": {"$ifNull": [{"$toString": "$_role._id"}, "$role_id"]},
+        "role_name": {"$ifNull": ["$_role.name", None]},
+        "role_display_name": {"$ifNull": ["$_role.display_name", None]},
+        "role": {"$ifNull": ["$_role.name", "$role"]},
+    }},
+    {"$project": {"_role_oid": 0, "_role_key": 0, "_role_by_id": 0, "_role_by_name": 0, "_role": 0}},
+]
+
+
+def _fill_role(mapping: dict, role: Optional[dict], by_name: bool) -> dict:
+    """Copy the resolved role's fields onto a mapping"""
+    if role:
+        mapping["role_name"] = role.get("name")
+        mapping["role_display_name"] = role.get("display_name")
+        if by_name:
+            mapping["role_id"] = role.get("id")
+        else:
+            mapping["role"] = role.get("name")  # Keep backward compatibility
 
-async def get_role_by_name(role_name: str) -> Optional[dict]:
-    """Get role by name"""
-    db = get_db()
-    roles_repo = MongoRepository("roles", db)
-    roles = await roles_repo.get_by_field("name", role_name.lower())
-    return roles[0] if roles else None
+    # Keep the documented response shape when the role could not be resolved
+    mapping.setdefault("role_name", None)
+    mapping.setdefault("role_display_name", None)
+    return mapping
 
 
 async def enrich_mapping_with_role(mapping: dict) -> dict:
     """Add role information to a user-organization mapping"""
     role_id = mapping.get("role_id")
-    role_name = mapping.get("role")
-
-    # If we have role_id, look up the role
-    if role_id:
-        role = await get_role_by_id(role_id)
-        if role:
-            mapping["role_name"] = role.get("name")
-            mapping["role_display_name"] = role.get("display_name")
-            mapping["role"] = role.get("name")  # Keep backward compatibility
-    # If we only have role name (legacy data), try to find role_id
-    elif role_name:
-        role = await get_role_by_name(role_name)
-        if role:
-            mapping["role_id"] = role.get("id")
-            mapping["role_name"] = role.get("name")
-            mapping["role_display_name"] = role.get("display_name")
-
-    return mapping
+    role = await resolve_role(role_id, mapping.get("role"))
+    # A role found by name (legacy data) also fills in the missing role_id
+    return _fill_role(mapping, role, by_name=not role_id)
+
+
+def organization_members_pipeline(organization_id: str) -> List[dict]:
+    """Pipeline joining an organization's mappings to their users and roles in a single query"""
+    return [
+        {"$match": {"organization_id": organization_id}},
+        *ROLE_LOOKUP_STAGES,
+        *lookup_by_id_stages("user_id", "users", "user", USER_RESPONSE_PROJECTION),
+        {"$unwind": "$user"},
+        {"$addFields": {"user.id": {"$toString": "$user._id"}}},
+        {"$project": {"user._id": 0}},
+        {"$project": {
+            "_id": 0,
+            "user": 1,
+            "role": {"$ifNull": ["$role", None]},
+            "role_id": {"$ifNull": ["$role_id", None]},
+            "role_display_name": 1,
+            "is_primary": {"$ifNull": ["$is_primary", None]},
+        }},
+    ]
 
 
 @router.post("/", response_model=UserOrganizationResponse, status_code=201)
 async def assign_user_to_organization(mapping: UserOrganizationCreate):
     """Assign a user to an organization with a specific role"""
-    db = get_db()
+    user_id = mapping.user_id
+    organization_id = mapping.organization_id
 
-    # Check if user exists
-    users_repo = MongoRepository("users", db)
-    user = await users_repo.get_by_id(str(mapping.user_id))
+    # The user, organization and duplicate-mapping checks are independent, so run them concurrently
+    mappings_repo = get_repository()
+    user, org, already_assigned = await asyncio.gather(
+        get_repo("users").get_by_id(user_id),
+        get_repo("organizations").get_by_id(organization_id),
+        mappings_repo.exists({"user_id": user_id, "organization_id": organization_id})
+    )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-
-    # Check if organization exists
-    orgs_repo = MongoRepository("organizations", db)
-    org = await orgs_repo.get_by_id(str(mapping.organization_id))
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
-
-    # Check if mapping already exists
-    mappings_repo = get_repository()
-    existing = await mappings_repo.get_by_field("user_id", str(mapping.user_id))
-    for e in existing:
-        if str(e.get("organization_id")) == str(mapping.organization_id):
-            raise HTTPException(status_code=400, detail="User already assigned to this organization")
+    if already_assigned:
+        raise HTTPException(status_code=400, detail="User already assigned to this organization")
 
     data = mapping.model_dump()
 
-    # If role_id is provided, validate it and get role name
+    # A role_id must exist; a bare role name is kept even if no such role exists (backward compatibility)
+    role = await resolve_role(data.get("role_id"), data.get("role"))
     if data.get("role_id"):
-        role = await get_role_by_id(data["role_id"])
         if not role:
             raise HTTPException(status_code=404, detail="Role not found")
         data["role"] = role.get("name")
-    # If only role name is provided, look up role_id
-    elif data.get("role"):
-        role = await get_role_by_name(data["role"])
-        if role:
-            data["role_id"] = role.get("id")
-        # Keep the role name even if role doesn't exist in collection (backward compatibility)
-
-    data["joined_at"] = datetime.now(timezone.utc)
-    data = create_document(data)
-    result = await mappings_repo.create(data)
-    return await enrich_mapping_with_role(result)
-
-
-@router.get("/", response_model=List[UserOrganizationResponse])
-async def get_all_mappings(skip: int = 0, limit: int = 100):
+    elif role:
+        data["role_id"] = role.get("id")
+
+    now = datetime.now(timezone.utc)
+    data["joined_at"] = now
+    data = create_document(data, now)
+    try:
+        result = await mappings_repo.create(data)
+    except DuplicateKeyError:
+        # The unique (user_id, organization_id) index catches an assignment racing the check above
+        raise HTTPException(status_code=400, detail="User already assigned to this organization")
+    # The role was resolved above, so fill it in without another lookup
+    return _fill_role(result, role, by_name=False)
+
+
+@router.get("/", responses={200: {"model": List[UserOrganizationResponse]}})
+async def get_all_mappings(skip: int = Query(0, ge=0), limit: int = Query(100, ge=0)):
     """Get all user-organization mappings"""
     repo = get_repository()
-    mappings = await repo.get_all(skip, limit)
-    return [await enrich_mapping_with_role(m) for m in mappings]
+    pipeline = [{"$sort": {"_id": 1}}, {"$skip": skip}]
+    if limit:
+        pipeline.append({"$limit": limit})
+    return MongoJSONResponse(await repo.aggregate(pipeline + ROLE_LOOKUP_STAGES))
 
 
-@router.get("/user/{user_id}", response_model=List[UserOrganizationResponse])
+@router.get("/user/{user_id}", responses={200: {"model": List[UserOrganizationResponse]}})
 async def get_user_organizations(user_id: str):
     """Get all organizations for a specific user"""
     repo = get_repository()
-    mappings = await repo.get_by_field("user_id", user_id)
-    return [await enrich_mapping_with_role(m) for m in mappings]
+    mappings = await repo.aggregate([{"$match": {"user_id": user_id}}] + ROLE_LOOKUP_STAGES)
+    return MongoJSONResponse(mappings)
 
 
-@router.get("/organization/{organization_id}", response_model=List[UserOrganizationResponse])
+@router.get("/organization/{organization_id}", responses={200: {"model": List[UserOrganizationResponse]}})
 async def get_organization_users(organization_id: str):
     """Get all users for a specific organization"""
     repo = get_repository()
-    mappings = await repo.get_by_field("organization_id", organization_id)
-    return [await enrich_mapping_with_role(m) for m in mappings]
+    mappings = await repo.aggregate([{"$match": {"organization_id": organization_id}}] + ROLE_LOOKUP_STAGES)
+    return MongoJSONResponse(mappings)
 
 
 @router.get("/organization/{organization_id}/details", response_model=OrganizationWithUsers)
 async def get_organization_with_users(organization_id: str):
     """Get organization with all its users and their roles"""
-    db = get_db()
-
-    orgs_repo = MongoRepository("organizations", db)
-    org = await orgs_repo.get_by_id(organization_id)
+    # The organization and its members are fetched concurrently
+    org, users = await asyncio.gather(
+        get_repo("organizations").get_by_id(organization_id),
+        get_repository().aggregate_raw(organization_members_pipeline(organization_id))
+    )
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
-
-    mappings_repo = MongoRepository("user_organizations", db)
-    mappings = await mappings_repo.get_by_field("organization_id", organization_id)
-
-    users_repo = MongoRepository("users", db)
-    users = []
-    for m in mappings:
-        user = await users_repo.get_by_id(str(m.get("user_id")))
-        if user:
-            # Get role information
-            role_info = await enrich_mapping_with_role(m)
-            users.append({
-                "user": user,
-                "role": role_info.get("role"),
-                "role_id": role_info.get("role_id"),
-                "role_display_name": role_info.get("role_display_name"),
-                "is_primary": m.get("is_primary")
-            })
     org["users"] = users
     return org
 
@@ -162,29 +176,30 @@ async def update_user_organization_role(mapping_id: str, mapping_update: UserOrg
     """Update a user's role in an organization"""
     repo = get_repository()
 
-    # Get existing mapping
-    existing = await repo.get_by_id(mapping_id)
+    update_data = mapping_update.model_dump(exclude_unset=True, exclude_none=True)
+
+    # The existing mapping and the role are independent, so fetch them concurrently
+    existing, role = await asyncio.gather(
+        repo.get_by_id(mapping_id),
+        resolve_role(update_data.get("role_id"), update_data.get("role"))
+    )
     if not existing:
         raise HTTPException(status_code=404, detail="Mapping not found")
 
-    update_data = mapping_update.model_dump(exclude_unset=True)
-
-    # If role_id is provided, validate it and update role name
     if update_data.get("role_id"):
-        role = await get_role_by_id(update_data["role_id"])
         if not role:
             raise HTTPException(status_code=404, detail="Role not found")
         update_data["role"] = role.get("name")
-    # If only role name is provided, look up role_id
-    elif update_data.get("role"):
-        role = await get_role_by_name(update_data["role"])
-        if role:
-            update_data["role_id"] = role.get("id")
+    elif role:
+        update_data["role_id"] = role.get("id")
 
     update_data = update_document(update_data)
     mapping = await repo.update(mapping_id, update_data)
     if not mapping:
         raise HTTPException(status_code=404, detail="Mapping not found")
+    # Reuse the role resolved above; only a mapping whose role was not changed needs a lookup
+    if role:
+        return _fill_role(mapping, role, by_name=False)
     return await enrich_mapping_with_role(mapping)
 
 
@@ -202,9 +217,17 @@ async def remove_user_from_organization(mapping_id: str):
 async def remove_user_from_organization_by_ids(user_id: str, organization_id: str):
     """Remove a user from an organization using user_id and organization_id"""
     repo = get_repository()
-    mappings = await repo.get_by_field("user_id", user_id)
-    for m in mappings:
-        if str(m.get("organization_id")) == organization_id:
-            await repo.delete(m.get("id"))
-            return None
-    raise HTTPException(status_code=404, detail="Mapping not found")
+    deleted = await repo.delete_where({"user_id": user_id, "organization_id": organization_id})
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Mapping not found")
+    return None
+
+
+@router.delete("/user/{user_id}", status_code=204)
+async def remove_user_from_all_organizations(user_id: str):
+    """Remove a user from every organization they belong to"""
+    repo = get_repository()
+    deleted = await repo.delete_many({"user_id": user_id})
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Mapping not found")
+    return None
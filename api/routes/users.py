@@ -1,16 +1,58 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
 from typing import List
 
-from database.database import get_db
 from schemas.schemas import UserCreate, UserUpdate, UserResponse, UserWithOrganizations
-from repositories.mongo_repository import MongoRepository
+from repositories.mongo_repository import get_repo, lookup_by_id_stages
 from models.models import create_document, update_document
+from auth.utils import invalidate_cached_user
+from utils.responses import MongoJSONResponse
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+# Only the fields in UserResponse are read for user lists, so password hashes never leave the database
+USER_RESPONSE_PROJECTION = {field: 1 for field in UserResponse.model_fields if field != "id"}
+
+# User fields listed per organization member
+ORGANIZATION_USER_FIELDS = ["email", "username", "first_name", "last_name", "phone", "is_active"]
+
 
 def get_repository():
-    return MongoRepository("users", get_db())
+    return get_repo("users")
+
+
+def organization_users_pipeline(organization_id: str) -> List[dict]:
+    """Pipeline joining an organization's mappings to their users in a single query"""
+    return [
+        {"$match": {"organization_id": organization_id}},
+        *lookup_by_id_stages("user_id", "users", "user", {field: 1 for field in ORGANIZATION_USER_FIELDS}),
+        {"$unwind": "$user"},
+        {"$project": {
+            "_id": 0,
+            "id": {"$toString": "$user._id"},
+            **{field: {"$ifNull": [f"$user.{field}", None]} for field in ORGANIZATION_USER_FIELDS},
+            "role": {"$ifNull": ["$role", None]},
+            "is_primary": {"$ifNull": ["$is_primary", None]},
+            "joined_at": {"$ifNull": ["$joined_at", None]},
+        }},
+    ]
+
+
+def user_organizations_pipeline(user_id: str) -> List[dict]:
+    """Pipeline joining a user's mappings to their organizations in a single query"""
+    return [
+        {"$match": {"user_id": user_id}},
+        *lookup_by_id_stages("organization_id", "organizations", "organization", {"name": 1, "code": 1}),
+        {"$unwind": "$organization"},
+        {"$project": {
+            "_id": 0,
+            "id": {"$toString": "$organization._id"},
+            "name": {"$ifNull": ["$organization.name", None]},
+            "code": {"$ifNull": ["$organization.code", None]},
+            "role": {"$ifNull": ["$role", None]},
+            "is_primary": {"$ifNull": ["$is_primary", None]},
+        }},
+    ]
 
 
 @router.post("/", response_model=UserResponse, status_code=201)
@@ -20,46 +62,23 @@ async def create_user(user: UserCreate):
     return await repo.create(data)
 
 
-@router.get("/", response_model=List[UserResponse])
-async def get_all_users(skip: int = 0, limit: int = 100):
+@router.get("/", responses={200: {"model": List[UserResponse]}})
+async def get_all_users(skip: int = Query(0, ge=0), limit: int = Query(100, ge=0)):
     repo = get_repository()
-    return await repo.get_all(skip, limit)
+    return MongoJSONResponse(await repo.get_all(skip, limit, projection=USER_RESPONSE_PROJECTION))
 
 
-@router.get("/organization/{organization_id}", response_model=List[dict])
+@router.get("/organization/{organization_id}", responses={200: {"model": List[dict]}})
 async def get_users_by_organization(organization_id: str):
     """Get all users for a specific organization with their roles"""
-    db = get_db()
-
-    # Check if organization exists
-    orgs_repo = MongoRepository("organizations", db)
-    org = await orgs_repo.get_by_id(organization_id)
+    # The organization check and the member query are independent, so run them concurrently
+    org, users = await asyncio.gather(
+        get_repo("organizations").get_by_id(organization_id),
+        get_repo("user_organizations").aggregate_raw(organization_users_pipeline(organization_id))
+    )
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
-
-    # Get all user-organization mappings for this organization
-    mappings_repo = MongoRepository("user_organizations", db)
-    mappings = await mappings_repo.get_by_field("organization_id", organization_id)
-
-    # Get user details for each mapping
-    users_repo = MongoRepository("users", db)
-    users = []
-    for m in mappings:
-        user = await users_repo.get_by_id(str(m.get("user_id")))
-        if user:
-            users.append({
-                "id": user.get("id"),
-                "email": user.get("email"),
-                "username": user.get("username"),
-                "first_name": user.get("first_name"),
-                "last_name": user.get("last_name"),
-                "phone": user.get("phone"),
-                "is_active": user.get("is_active"),
-                "role": m.get("role"),
-                "is_primary": m.get("is_primary"),
-                "joined_at": m.get("joined_at")
-            })
-    return users
+    return MongoJSONResponse(users)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -73,28 +92,13 @@ async def get_user(user_id: str):
 
 @router.get("/{user_id}/organizations", response_model=UserWithOrganizations)
 async def get_user_with_organizations(user_id: str):
-    db = get_db()
-
-    users_repo = MongoRepository("users", db)
-    user = await users_repo.get_by_id(user_id)
+    # The user and their organizations are fetched concurrently
+    user, organizations = await asyncio.gather(
+        get_repo("users").get_by_id(user_id),
+        get_repo("user_organizations").aggregate_raw(user_organizations_pipeline(user_id))
+    )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-
-    user_orgs_repo = MongoRepository("user_organizations", db)
-    user_orgs = await user_orgs_repo.get_by_field("user_id", user_id)
-
-    orgs_repo = MongoRepository("organizations", db)
-    organizations = []
-    for uo in user_orgs:
-        org = await orgs_repo.get_by_id(str(uo.get("organization_id")))
-        if org:
-            organizations.append({
-                "id": org.get("id"),
-                "name": org.get("name"),
-                "code": org.get("code"),
-                "role": uo.get("role"),
-                "is_primary": uo.get("is_primary")
-            })
     user["organizations"] = organizations
     return user
 
@@ -102,10 +106,11 @@ async def get_user_with_organizations(user_id: str):
 @router.put("/{user_id}", response_model=UserResponse)
 async def update_user(user_id: str, user_update: UserUpdate):
     repo = get_repository()
-    update_data = update_document(user_update.model_dump(exclude_unset=True))
+    update_data = update_document(user_update.model_dump(exclude_unset=True, exclude_none=True))
     user = await repo.update(user_id, update_data)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    invalidate_cached_user(user_id)
     return user
 
 
@@ -115,4 +120,5 @@ async def delete_user(user_id: str):
     deleted = await repo.delete(user_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="User not found")
+    invalidate_cached_user(user_id)
     return None
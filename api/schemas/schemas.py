@@ -2,6 +2,7 @@ from pydantic import BaseModel, EmailStr
 from typing import Optional, List, Any
 from datetime import datetime
 from enum import Enum
+from types import MappingProxyType
 
 
 class RoleEnum(str, Enum):
@@ -108,6 +109,24 @@ ROLE_PERMISSIONS = {
     },
 }
 
+# Freeze the permission tables, so the shared sets cannot be changed by any caller
+ROLE_PERMISSIONS = MappingProxyType({
+    role: MappingProxyType(permissions) for role, permissions in ROLE_PERMISSIONS.items()
+})
+
+# Same permissions keyed by the raw role string stored on mappings
+ROLE_PERMISSIONS_BY_NAME = MappingProxyType({role.value: permissions for role, permissions in ROLE_PERMISSIONS.items()})
+
+# One bit per permission, and each role's granted permissions as a bitmask
+PERMISSION_BITS = MappingProxyType({
+    permission: 1 << bit
+    for bit, permission in enumerate(sorted({p for permissions in ROLE_PERMISSIONS.values() for p in permissions}))
+})
+ROLE_PERMISSION_BITS = MappingProxyType({
+    role: sum(PERMISSION_BITS[p] for p, granted in permissions.items() if granted)
+    for role, permissions in ROLE_PERMISSIONS_BY_NAME.items()
+})
+
 
 # Organization Schemas
 class OrganizationBase(BaseModel):
@@ -4,13 +4,28 @@ Run: python seed_data.py
 """
 
 import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from passlib.context import CryptContext
+from typing import Tuple
+from bson import ObjectId
 from pymongo import MongoClient
+from pymongo.write_concern import WriteConcern
 from config import settings
+from database.database import INDEXES
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Every seeded user shares one of two passwords, so each is hashed once and the digest reused.
+# bcrypt releases the GIL, so the two hashes are computed in parallel
+with ThreadPoolExecutor(max_workers=2) as executor:
+    PASSWORD123_HASH, ADMIN123_HASH = executor.map(pwd_context.hash, ["password123", "admin123"])
+
+# Seeded generator for all sample data, so every run produces the same data set
+SEED = 42
+rng = random.Random(SEED)
+
 # Sample data
 ORGANIZATION_NAMES = [
     ("Blackstone Real Estate", "BRE"),
@@ -67,11 +82,28 @@ STREET_NAMES = ["Main St", "Oak Ave", "Park Blvd", "Market St", "Broadway", "Wal
 
 
 def random_date(start_year=2018, end_year=2024):
+    return random_dates(1, start_year, end_year)[0]
+
+
+def random_dates(count: int, start_year=2018, end_year=2024) -> list:
+    """Draw a column of random dates in one call"""
     start = datetime(start_year, 1, 1, tzinfo=timezone.utc)
     end = datetime(end_year, 12, 31, tzinfo=timezone.utc)
-    delta = end - start
-    random_days = random.randint(0, delta.days)
-    return start + timedelta(days=random_days)
+    days = rng.choices(range((end - start).days + 1), k=count)
+    return [start + timedelta(days=day) for day in days]
+
+
+# Seed data is regenerable, so bulk inserts don't wait for acknowledgement (counts are verified at the end)
+UNACKNOWLEDGED = WriteConcern(w=0)
+
+
+def insert_all(collection, docs: list) -> list:
+    """Insert documents in a single unordered, unacknowledged batch, setting each document's _id"""
+    if docs:
+        result = collection.with_options(write_concern=UNACKNOWLEDGED).insert_many(docs, ordered=False)
+        for doc, inserted_id in zip(docs, result.inserted_ids):
+            doc["_id"] = inserted_id
+    return docs
 
 
 def create_organizations(db) -> list:
@@ -86,10 +118,9 @@ def create_organizations(db) -> list:
             "created_at": random_date(2018, 2022),
             "updated_at": None
         }
-        result = db.organizations.insert_one(org)
-        org["_id"] = result.inserted_id
         organizations.append(org)
 
+    insert_all(db.organizations, organizations)
     print(f"Created {len(organizations)} organizations")
     return organizations
 
@@ -97,51 +128,53 @@ def create_organizations(db) -> list:
 def create_users(db, count: int = 30) -> list:
     """Create sample users"""
     users = []
-    used_usernames = set()
+    # Times each first.last pair has been drawn, so a repeat gets the next numeric suffix directly
+    username_counts = Counter()
+
+    # Each column is drawn in one call rather than one draw per document
+    first_names = rng.choices(FIRST_NAMES, k=count)
+    last_names = rng.choices(LAST_NAMES, k=count)
+    created_dates = random_dates(count, 2020, 2024)
 
     for i in range(count):
-        first_name = random.choice(FIRST_NAMES)
-        last_name = random.choice(LAST_NAMES)
+        first_name = first_names[i]
+        last_name = last_names[i]
 
         # Generate unique username
         base_username = f"{first_name.lower()}.{last_name.lower()}"
-        username = base_username
-        counter = 1
-        while username in used_usernames:
-            username = f"{base_username}{counter}"
-            counter += 1
-        used_usernames.add(username)
+        seen = username_counts[base_username]
+        username = f"{base_username}{seen}" if seen else base_username
+        username_counts[base_username] += 1
 
         user = {
             "username": username,
             "email": f"{username}@fundops.com",
-            "hashed_password": pwd_context.hash("password123"),
+            "hashed_password": PASSWORD123_HASH,
             "first_name": first_name,
             "last_name": last_name,
             "is_active": True,
             "is_superuser": False,
-            "created_at": random_date(2020, 2024),
+            "created_at": created_dates[i],
             "updated_at": None
         }
-        result = db.users.insert_one(user)
-        user["_id"] = result.inserted_id
         users.append(user)
 
+    insert_all(db.users, users)
     print(f"Created {len(users)} users")
     return users
 
 
 def create_user_organization_mappings(db, users: list, organizations: list):
     """Map users to organizations with roles"""
-    mappings_created = 0
+    mappings = []
 
     for user in users:
         # Each user belongs to 1-3 organizations
-        num_orgs = random.randint(1, 3)
-        user_orgs = random.sample(organizations, min(num_orgs, len(organizations)))
+        num_orgs = min(rng.randint(1, 3), len(organizations))
+        user_orgs = rng.sample(organizations, num_orgs)
+        roles = rng.choices(ROLES, k=num_orgs)
 
-        for i, org in enumerate(user_orgs):
-            role = random.choice(ROLES)
+        for i, (org, role) in enumerate(zip(user_orgs, roles)):
             mapping = {
                 "user_id": str(user["_id"]),
                 "organization_id": str(org["_id"]),
@@ -151,15 +184,19 @@ def create_user_organization_mappings(db, users: list, organizations: list):
                 "created_at": datetime.now(timezone.utc),
                 "updated_at": None
             }
-            db.user_organizations.insert_one(mapping)
-            mappings_created += 1
+            mappings.append(mapping)
 
-    print(f"Created {mappings_created} user-organization mappings")
+    insert_all(db.user_organizations, mappings)
+    print(f"Created {len(mappings)} user-organization mappings")
 
 
-def create_funds(db, organizations: list) -> list:
-    """Create sample funds for each organization"""
+def create_funds(db, organizations: list) -> Tuple[list, dict]:
+    """
+    Create sample funds for each organization
+    Returns: (funds, funds by organization id)
+    """
     funds = []
+    org_funds = {}
     fund_names = [
         "Core Plus Fund", "Value-Add Fund", "Opportunistic Fund", "Growth Fund",
         "Income Fund", "Development Fund", "Debt Fund", "Balanced Fund",
@@ -167,39 +204,48 @@ def create_funds(db, organizations: list) -> list:
     ]
 
     for org in organizations:
+        org_id = str(org["_id"])
+        org_funds[org_id] = []
         # Each organization has 2-5 funds
-        num_funds = random.randint(2, 5)
-        org_fund_names = random.sample(fund_names, num_funds)
-
-        for fund_name in org_fund_names:
-            target_size = random.randint(100, 2000) * 1_000_000  # $100M to $2B
-            current_size = int(target_size * random.uniform(0.3, 1.2))
+        num_funds = rng.randint(2, 5)
+        org_fund_names = rng.sample(fund_names, num_funds)
+        target_sizes = rng.choices(range(100, 2001), k=num_funds)  # $100M to $2B
+        size_ratios = [rng.uniform(0.3, 1.2) for _ in range(num_funds)]
+        fund_types = rng.choices(FUND_TYPES, k=num_funds)
+        vintage_years = rng.choices(range(2018, 2025), k=num_funds)
+        statuses = rng.choices(FUND_STATUSES, k=num_funds)
+        created_dates = random_dates(num_funds, 2019, 2024)
+
+        for i, fund_name in enumerate(org_fund_names):
+            target_size = target_sizes[i] * 1_000_000
+            current_size = int(target_size * size_ratios[i])
 
             fund = {
                 "name": f"{org['code']} {fund_name}",
                 "description": f"{fund_name} managed by {org['name']}",
-                "fund_type": random.choice(FUND_TYPES),
+                "fund_type": fund_types[i],
                 "target_size": target_size,
                 "current_size": current_size,
                 "currency": "USD",
-                "vintage_year": random.randint(2018, 2024),
-                "status": random.choice(FUND_STATUSES),
-                "organization_id": str(org["_id"]),
-                "created_at": random_date(2019, 2024),
+                "vintage_year": vintage_years[i],
+                "status": statuses[i],
+                "organization_id": org_id,
+                "created_at": created_dates[i],
                 "updated_at": None
             }
-            result = db.funds.insert_one(fund)
-            fund["_id"] = result.inserted_id
             funds.append(fund)
+            org_funds[org_id].append(fund)
 
+    insert_all(db.funds, funds)
     print(f"Created {len(funds)} funds")
-    return funds
-
+    return funds, org_funds
 
-def create_investors(db, organizations: list, count: int = 50) -> list:
-    """Create sample investors and assign them to organizations"""
-    investors = []
 
+def create_investors(db, organizations: list, org_funds: dict, count: int = 50) -> Tuple[list, int]:
+    """
+    Create sample investors, assign them to organizations and allocate them to funds
+    Returns: (investors, allocations_count)
+    """
     investor_name_prefixes = [
         "California Public", "New York State", "Texas Teachers", "Ohio Municipal",
         "Pacific Coast", "Atlantic", "Midwest", "Southern States", "Northern Trust",
@@ -212,56 +258,80 @@ def create_investors(db, organizations: list, count: int = 50) -> list:
     ]
 
     used_names = set()
-
-    for i in range(count):
-        # Generate unique investor name
-        name = f"{random.choice(investor_name_prefixes)} {random.choice(investor_name_suffixes)}"
-        while name in used_names:
-            name = f"{random.choice(investor_name_prefixes)} {random.choice(investor_name_suffixes)} {random.randint(1, 99)}"
+    # Repeats per base name; numbers from 100 up never clash with the random 1-99 suffixes
+    name_repeats = Counter()
+
+    # Each column is drawn in one call rather than one draw per document
+    prefixes = rng.choices(investor_name_prefixes, k=count)
+    suffixes = rng.choices(investor_name_suffixes, k=count)
+    cities = rng.choices(CITIES, k=count)
+    investor_orgs = rng.choices(organizations, k=count)
+    commitments = rng.choices(range(10, 501), k=count)  # $10M to $500M
+    investor_types = rng.choices(INVESTOR_TYPES, k=count)
+    phone_a = rng.choices(range(200, 1000), k=count)
+    phone_b = rng.choices(range(100, 1000), k=count)
+    phone_c = rng.choices(range(1000, 10000), k=count)
+    street_numbers = rng.choices(range(100, 10000), k=count)
+    streets = rng.choices(STREET_NAMES, k=count)
+    status_draws = [rng.random() for _ in range(count)]
+    active_draws = [rng.random() for _ in range(count)]
+    created_dates = random_dates(count, 2019, 2024)
+
+    # Unique investor names, resolved in draw order
+    names = []
+    for prefix, suffix in zip(prefixes, suffixes):
+        base_name = f"{prefix} {suffix}"
+        name = base_name
+        if name in used_names:
+            name = f"{base_name} {rng.randint(1, 99)}"
+            if name in used_names:
+                name = f"{base_name} {100 + name_repeats[base_name]}"
+                name_repeats[base_name] += 1
         used_names.add(name)
+        names.append(name)
 
-        city, state, country = random.choice(CITIES)
-
-        # Assign investor to a random organization
-        org = random.choice(organizations)
-        commitment_amount = random.randint(10, 500) * 1_000_000  # $10M to $500M
+    # Derived string columns, then one pass zipping the columns into documents
+    emails = [f"contact@{name.lower().replace(' ', '')[:20]}.com" for name in names]
+    phones = [f"+1-{a}-{b}-{c}" for a, b, c in zip(phone_a, phone_b, phone_c)]
+    addresses = [f"{number} {street}" for number, street in zip(street_numbers, streets)]
 
-        investor = {
+    investors = [
+        {
+            "_id": ObjectId(),  # Assigned up front so allocations can reference it before insertion
             "name": name,
-            "investor_type": random.choice(INVESTOR_TYPES),
-            "email": f"contact@{name.lower().replace(' ', '')[:20]}.com",
-            "phone": f"+1-{random.randint(200,999)}-{random.randint(100,999)}-{random.randint(1000,9999)}",
-            "address": f"{random.randint(100, 9999)} {random.choice(STREET_NAMES)}",
+            "investor_type": investor_type,
+            "email": email,
+            "phone": phone,
+            "address": address,
             "city": city,
             "state": state,
             "country": country,
-            "commitment_amount": commitment_amount,
-            "funded_amount": 0,  # Will be calculated from fund allocations
-            "organization_id": str(org["_id"]),
-            "status": "active" if random.random() > 0.1 else "inactive",
-            "is_active": random.random() > 0.1,  # 90% active
-            "created_at": random_date(2019, 2024),
+            "commitment_amount": commitment * 1_000_000,
+            "funded_amount": 0,  # Set from the fund allocations below
+            "organization_id": str(org["_id"]),  # Investor is assigned to a random organization
+            "status": "active" if status_draw > 0.1 else "inactive",
+            "is_active": active_draw > 0.1,  # 90% active
+            "created_at": created_at,
             "updated_at": None
         }
-        result = db.investors.insert_one(investor)
-        investor["_id"] = result.inserted_id
-        investors.append(investor)
+        for name, investor_type, email, phone, address, (city, state, country), commitment, org,
+            status_draw, active_draw, created_at
+        in zip(names, investor_types, emails, phones, addresses, cities, commitments, investor_orgs,
+               status_draws, active_draws, created_dates)
+    ]
 
+    # Allocations are generated first, so every investor is written once with its final funded_amount
+    allocations = generate_investor_fund_allocations(investors, org_funds)
+    insert_all(db.investors, investors)
     print(f"Created {len(investors)} investors")
-    return investors
+    insert_all(db.investor_funds, allocations)
+    print(f"Created {len(allocations)} investor-fund allocations")
+    return investors, len(allocations)
 
 
-def create_investor_fund_allocations(db, investors: list, funds: list) -> int:
-    """Create investor-fund allocations with percentage allocations"""
-    allocations_created = 0
-
-    # Group funds by organization
-    org_funds = {}
-    for fund in funds:
-        org_id = fund["organization_id"]
-        if org_id not in org_funds:
-            org_funds[org_id] = []
-        org_funds[org_id].append(fund)
+def generate_investor_fund_allocations(investors: list, org_funds: dict) -> list:
+    """Build investor-fund allocations with percentage allocations, setting each investor's funded_amount"""
+    allocations = []
 
     for investor in investors:
         org_id = investor["organization_id"]
@@ -271,15 +341,15 @@ def create_investor_fund_allocations(db, investors: list, funds: list) -> int:
             continue
 
         # Each investor invests in 1-3 funds from their organization
-        num_funds = min(random.randint(1, 3), len(available_funds))
-        selected_funds = random.sample(available_funds, num_funds)
+        num_funds = min(rng.randint(1, 3), len(available_funds))
+        selected_funds = rng.sample(available_funds, num_funds)
 
         # Generate allocation percentages that sum to 100%
         if num_funds == 1:
             percentages = [100.0]
         else:
             # Generate random percentages
-            raw_percentages = [random.randint(20, 60) for _ in range(num_funds)]
+            raw_percentages = rng.choices(range(20, 61), k=num_funds)
             total = sum(raw_percentages)
             percentages = [round((p / total) * 100, 1) for p in raw_percentages]
             # Adjust last one to ensure sum is exactly 100
@@ -290,7 +360,7 @@ def create_investor_fund_allocations(db, investors: list, funds: list) -> int:
 
         for fund, percentage in zip(selected_funds, percentages):
             fund_commitment = int(total_commitment * (percentage / 100))
-            fund_funded = int(fund_commitment * random.uniform(0.3, 1.0))
+            fund_funded = int(fund_commitment * rng.uniform(0.3, 1.0))
             total_funded += fund_funded
 
             allocation = {
@@ -303,17 +373,12 @@ def create_investor_fund_allocations(db, investors: list, funds: list) -> int:
                 "created_at": random_date(2020, 2024),
                 "updated_at": None
             }
-            db.investor_funds.insert_one(allocation)
-            allocations_created += 1
+            allocations.append(allocation)
 
-        # Update investor's total funded amount
-        db.investors.update_one(
-            {"_id": investor["_id"]},
-            {"$set": {"funded_amount": total_funded}}
-        )
+        # Investor's total funded amount
+        investor["funded_amount"] = total_funded
 
-    print(f"Created {allocations_created} investor-fund allocations")
-    return allocations_created
+    return allocations
 
 
 def create_properties(db, funds: list, count: int = 40) -> list:
@@ -325,53 +390,67 @@ def create_properties(db, funds: list, count: int = 40) -> list:
         "Commons", "Place", "Court", "Point", "Ridge", "View", "Landing"
     ]
 
+    # Each column is drawn in one call rather than one draw per document
+    cities = rng.choices(CITIES, k=count)
+    property_types = rng.choices(PROPERTY_TYPES, k=count)
+    name_prefixes = rng.choices(property_name_prefixes, k=count)
+    name_draws = [rng.random() for _ in range(count)]
+    name_numbers = rng.choices(range(100, 1000), k=count)
+    name_streets = rng.choices(STREET_NAMES, k=count)
+    acquisition_prices = rng.choices(range(10, 501), k=count)  # $10M to $500M
+    value_ratios = [rng.uniform(0.8, 1.5) for _ in range(count)]
+    property_funds = rng.choices(funds, k=count)
+    street_numbers = rng.choices(range(100, 10000), k=count)
+    streets = rng.choices(STREET_NAMES, k=count)
+    acquisition_dates = random_dates(count, 2018, 2023)
+    square_footages = rng.choices(range(50000, 500001), k=count)
+    statuses = rng.choices(PROPERTY_STATUSES, k=count)
+    created_dates = random_dates(count, 2019, 2024)
+
     for i in range(count):
-        city, state, country = random.choice(CITIES)
-        property_type = random.choice(PROPERTY_TYPES)
+        city, state, country = cities[i]
+        property_type = property_types[i]
 
-        name = f"{city} {random.choice(property_name_prefixes)}"
-        if random.random() > 0.5:
-            name = f"{random.randint(100, 999)} {random.choice(STREET_NAMES)} {random.choice(property_name_prefixes)}"
+        name = f"{city} {name_prefixes[i]}"
+        if name_draws[i] > 0.5:
+            name = f"{name_numbers[i]} {name_streets[i]} {name_prefixes[i]}"
 
-        acquisition_price = random.randint(10, 500) * 1_000_000  # $10M to $500M
-        current_value = int(acquisition_price * random.uniform(0.8, 1.5))
+        acquisition_price = acquisition_prices[i] * 1_000_000
+        current_value = int(acquisition_price * value_ratios[i])
 
         # Assign property to a random fund
-        fund = random.choice(funds)
+        fund = property_funds[i]
 
         prop = {
             "name": name,
             "property_type": property_type,
-            "address": f"{random.randint(100, 9999)} {random.choice(STREET_NAMES)}",
+            "address": f"{street_numbers[i]} {streets[i]}",
             "city": city,
             "state": state,
             "country": country,
-            "acquisition_date": random_date(2018, 2023),
+            "acquisition_date": acquisition_dates[i],
             "acquisition_price": acquisition_price,
             "current_value": current_value,
-            "square_footage": random.randint(50000, 500000),
+            "square_footage": square_footages[i],
             "fund_id": str(fund["_id"]),
-            "status": random.choice(PROPERTY_STATUSES),
-            "created_at": random_date(2019, 2024),
+            "status": statuses[i],
+            "created_at": created_dates[i],
             "updated_at": None
         }
-        result = db.properties.insert_one(prop)
-        prop["_id"] = result.inserted_id
         properties.append(prop)
 
+    insert_all(db.properties, properties)
     print(f"Created {len(properties)} properties")
     return properties
 
 
 def create_admin_users(db, organizations: list) -> list:
     """Create super admin and org admin users for testing"""
-    admins = []
-
     # 1. Platform Super Admin (can access everything)
     super_admin = {
         "username": "superadmin",
         "email": "superadmin@fundops.com",
-        "hashed_password": pwd_context.hash("admin123"),
+        "hashed_password": ADMIN123_HASH,
         "first_name": "Platform",
         "last_name": "Super Admin",
         "is_active": True,
@@ -379,18 +458,12 @@ def create_admin_users(db, organizations: list) -> list:
         "created_at": datetime.now(timezone.utc),
         "updated_at": None
     }
-    result = db.users.insert_one(super_admin)
-    super_admin["_id"] = result.inserted_id
-    admins.append(super_admin)
-
-    # Super admin doesn't need org mappings - they can see all orgs via is_superuser flag
-    print(f"Created platform super admin (username: superadmin, password: admin123)")
 
     # 2. System Admin - has 'admin' role in ALL organizations
     sys_admin = {
         "username": "sysadmin",
         "email": "sysadmin@fundops.com",
-        "hashed_password": pwd_context.hash("admin123"),
+        "hashed_password": ADMIN123_HASH,
         "first_name": "System",
         "last_name": "Admin",
         "is_active": True,
@@ -398,13 +471,46 @@ def create_admin_users(db, organizations: list) -> list:
         "created_at": datetime.now(timezone.utc),
         "updated_at": None
     }
-    result = db.users.insert_one(sys_admin)
-    sys_admin["_id"] = result.inserted_id
-    admins.append(sys_admin)
+    admins = [super_admin, sys_admin]
+
+    if len(organizations) > 0:
+        # 3. Organization Admin for first org (can manage users in their org only)
+        org_admin = {
+            "username": "orgadmin",
+            "email": "orgadmin@fundops.com",
+            "hashed_password": ADMIN123_HASH,
+            "first_name": "Organization",
+            "last_name": "Admin",
+            "is_active": True,
+            "is_superuser": False,  # NOT a platform super admin
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": None
+        }
+
+        # 4. Regular user (viewer role) for testing
+        regular_user = {
+            "username": "viewer",
+            "email": "viewer@fundops.com",
+            "hashed_password": ADMIN123_HASH,
+            "first_name": "Regular",
+            "last_name": "Viewer",
+            "is_active": True,
+            "is_superuser": False,
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": None
+        }
+        admins += [org_admin, regular_user]
+
+    # All admin users go in one batch, then all of their mappings in another
+    insert_all(db.users, admins)
+    mappings = []
+
+    # Super admin doesn't need org mappings - they can see all orgs via is_superuser flag
+    print(f"Created platform super admin (username: superadmin, password: admin123)")
 
     # Map system admin to ALL organizations with 'admin' role
     for i, org in enumerate(organizations):
-        mapping = {
+        mappings.append({
             "user_id": str(sys_admin["_id"]),
             "organization_id": str(org["_id"]),
             "role": "admin",  # Organization-level admin role
@@ -412,31 +518,14 @@ def create_admin_users(db, organizations: list) -> list:
             "joined_at": datetime.now(timezone.utc),
             "created_at": datetime.now(timezone.utc),
             "updated_at": None
-        }
-        db.user_organizations.insert_one(mapping)
+        })
 
     print(f"Created system admin (username: sysadmin, password: admin123) - admin in all {len(organizations)} orgs")
 
-    # 2. Organization Admin for first org (can manage users in their org only)
     if len(organizations) > 0:
-        org_admin = {
-            "username": "orgadmin",
-            "email": "orgadmin@fundops.com",
-            "hashed_password": pwd_context.hash("admin123"),
-            "first_name": "Organization",
-            "last_name": "Admin",
-            "is_active": True,
-            "is_superuser": False,  # NOT a platform super admin
-            "created_at": datetime.now(timezone.utc),
-            "updated_at": None
-        }
-        result = db.users.insert_one(org_admin)
-        org_admin["_id"] = result.inserted_id
-        admins.append(org_admin)
-
         # Map org admin to first two organizations with 'admin' role
         for i, org in enumerate(organizations[:2]):
-            mapping = {
+            mappings.append({
                 "user_id": str(org_admin["_id"]),
                 "organization_id": str(org["_id"]),
                 "role": "admin",  # Organization-level admin role
@@ -444,30 +533,12 @@ def create_admin_users(db, organizations: list) -> list:
                 "joined_at": datetime.now(timezone.utc),
                 "created_at": datetime.now(timezone.utc),
                 "updated_at": None
-            }
-            db.user_organizations.insert_one(mapping)
+            })
 
         print(f"Created org admin (username: orgadmin, password: admin123) - admin for {organizations[0]['name']}")
 
-    # 3. Regular user (viewer role) for testing
-    if len(organizations) > 0:
-        regular_user = {
-            "username": "viewer",
-            "email": "viewer@fundops.com",
-            "hashed_password": pwd_context.hash("admin123"),
-            "first_name": "Regular",
-            "last_name": "Viewer",
-            "is_active": True,
-            "is_superuser": False,
-            "created_at": datetime.now(timezone.utc),
-            "updated_at": None
-        }
-        result = db.users.insert_one(regular_user)
-        regular_user["_id"] = result.inserted_id
-        admins.append(regular_user)
-
         # Map viewer to first org with 'viewer' role
-        mapping = {
+        mappings.append({
             "user_id": str(regular_user["_id"]),
             "organization_id": str(organizations[0]["_id"]),
             "role": "viewer",  # Read-only role
@@ -475,11 +546,11 @@ def create_admin_users(db, organizations: list) -> list:
             "joined_at": datetime.now(timezone.utc),
             "created_at": datetime.now(timezone.utc),
             "updated_at": None
-        }
-        db.user_organizations.insert_one(mapping)
+        })
 
         print(f"Created viewer user (username: viewer, password: admin123) - viewer in {organizations[0]['name']}")
 
+    insert_all(db.user_organizations, mappings)
     return admins
 
 
@@ -489,8 +560,16 @@ def seed_database():
     print("Fund Ops Admin - MongoDB Database Seeder")
     print("=" * 50)
 
-    # Connect to MongoDB
-    client = MongoClient(settings.database_url)
+    # Connect to MongoDB. The seeder writes sequentially from one thread, so a single warm connection
+    # is enough; writes only wait for the primary's acknowledgement (the cluster default may be majority)
+    client = MongoClient(
+        settings.database_url,
+        maxPoolSize=1,
+        minPoolSize=1,
+        serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        compressors=settings.MONGODB_COMPRESSORS,
+        w=1,
+    )
     db = client[settings.MONGODB_DB]
 
     try:
@@ -512,30 +591,43 @@ def seed_database():
             db.users.delete_many({})
             db.organizations.delete_many({})
 
+        # Unique constraints go in before loading, so duplicate seed data fails on insert
+        print("Creating unique indexes...")
+        for collection, keys, options in INDEXES:
+            if options.get("unique"):
+                db[collection].create_index(keys, **options)
+
         print("\nSeeding database...\n")
+        rng.seed(SEED)
 
         # Create data
         organizations = create_organizations(db)
         users = create_users(db, count=30)
         create_user_organization_mappings(db, users, organizations)
         admins = create_admin_users(db, organizations)
-        funds = create_funds(db, organizations)
-        investors = create_investors(db, organizations, count=50)
-        allocations_count = create_investor_fund_allocations(db, investors, funds)
+        funds, org_funds = create_funds(db, organizations)
+        investors, allocations_count = create_investors(db, organizations, org_funds, count=50)
         properties = create_properties(db, funds, count=40)
 
-        # Create indexes
+        # Secondary indexes are built once over the loaded data instead of being maintained per insert
         print("\nCreating indexes...")
-        db.users.create_index("username", unique=True)
-        db.users.create_index("email", unique=True)
-        db.organizations.create_index("code", unique=True)
-        db.user_organizations.create_index([("user_id", 1), ("organization_id", 1)], unique=True)
-        db.funds.create_index("organization_id")
-        db.investors.create_index("organization_id")
-        db.investor_funds.create_index("investor_id")
-        db.investor_funds.create_index("fund_id")
-        db.investor_funds.create_index([("investor_id", 1), ("fund_id", 1)], unique=True)
-        db.properties.create_index("fund_id")
+        for collection, keys, options in INDEXES:
+            if not options.get("unique"):
+                db[collection].create_index(keys, **options)
+
+        # The inserts were unacknowledged, so check that every document landed (e.g. none hit a unique index)
+        expected_counts = {
+            "organizations": len(organizations),
+            "users": len(users) + len(admins),
+            "funds": len(funds),
+            "investors": len(investors),
+            "investor_funds": allocations_count,
+            "properties": len(properties),
+        }
+        for collection, expected in expected_counts.items():
+            actual = db[collection].count_documents({})
+            if actual != expected:
+                raise RuntimeError(f"Expected {expected} {collection}, found {actual}")
 
         print("\n" + "=" * 50)
         print("Database seeding completed successfully!")
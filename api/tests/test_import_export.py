@@ -0,0 +1,147 @@
+import asyncio
+from datetime import date, datetime
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from utils.import_export import (
+    DATE_FORMATS,
+    _InvalidDate,
+    _calamine_value,
+    _to_datetime,
+    insert_in_batches,
+    validate_and_convert_row,
+)
+
+
+class FakeRepo:
+    """Records each create_many batch, failing the batches listed in errors"""
+
+    def __init__(self, errors=None):
+        self.batches = []
+        self.errors = errors or {}
+
+    async def create_many(self, docs):
+        self.batches.append(docs)
+        error = self.errors.get(len(self.batches) - 1)
+        if error:
+            raise error
+        return [str(i) for i in range(len(docs))]
+
+
+def run_insert(repo, docs, batch_size):
+    return asyncio.run(insert_in_batches(repo, docs, "fund", batch_size=batch_size))
+
+
+def test_insert_in_batches_splits_into_batches():
+    docs = [(row, {"name": f"Fund {row}"}) for row in range(2, 7)]
+    repo = FakeRepo()
+
+    assert run_insert(repo, docs, batch_size=2) == (5, 0, [])
+    assert [len(batch) for batch in repo.batches] == [2, 2, 1]
+
+
+def test_insert_in_batches_maps_write_errors_to_row_numbers():
+    docs = [(row, {"name": f"Fund {row}"}) for row in range(2, 7)]
+    # Second batch holds rows 4 and 5; its document at index 1 (row 5) fails
+    error = BulkWriteError({"nInserted": 1, "writeErrors": [{"index": 1, "errmsg": "duplicate key"}]})
+    repo = FakeRepo(errors={1: error})
+
+    inserted, failed, errors = run_insert(repo, docs, batch_size=2)
+
+    assert (inserted, failed) == (4, 1)
+    assert errors == ["Row 5: Failed to create fund - duplicate key"]
+
+
+def test_insert_in_batches_reports_other_failures_per_batch():
+    docs = [(row, {"name": f"Fund {row}"}) for row in range(2, 7)]
+    repo = FakeRepo(errors={0: RuntimeError("connection lost")})
+
+    inserted, failed, errors = run_insert(repo, docs, batch_size=3)
+
+    assert (inserted, failed) == (2, 3)
+    assert errors == ["Rows 2-4: Failed to create fund - connection lost"]
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("", None),
+    ("text", "text"),
+    (5.0, 5),
+    (5551234567.0, 5551234567),
+    (5.5, 5.5),
+    (True, True),
+    (date(2024, 3, 15), datetime(2024, 3, 15)),
+    (datetime(2024, 3, 15, 10, 30), datetime(2024, 3, 15, 10, 30)),
+])
+def test_calamine_value(value, expected):
+    result = _calamine_value(value)
+    assert result == expected
+    assert type(result) is type(expected)
+
+
+def _strptime_only(value):
+    """Date parsing as it was before the fromisoformat fast path"""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise _InvalidDate(value)
+
+
+@pytest.mark.parametrize("value", [
+    "2024-03-15",
+    "2024-03-15T10:20:30",
+    "03/15/2024",
+    "15/03/2024",
+    "2024-3-5",
+])
+def test_to_datetime_matches_strptime_formats(value):
+    assert _to_datetime(value) == _strptime_only(value)
+
+
+@pytest.mark.parametrize("value", [
+    "2024-02-30",
+    "15.03.2024",
+    "not a date",
+    # Accepted by datetime.fromisoformat but not by any of DATE_FORMATS
+    "2024-03-15 10:20:30",
+    "2024-W11-5",
+    "2024-03-15T10:20+01",
+    "2024-03-15T102030.5",
+])
+def test_to_datetime_rejects_invalid_dates(value):
+    with pytest.raises(_InvalidDate):
+        _to_datetime(value)
+
+
+def test_to_datetime_passes_through_datetimes_and_ignores_other_types():
+    value = datetime(2024, 3, 15)
+    assert _to_datetime(value) is value
+    assert _to_datetime(45000) is None
+
+
+def test_validate_and_convert_row_converts_numbers():
+    row = {"name": "Fund", "target_size": "1500000.50", "vintage_year": "2021.0", "is_active": "yes"}
+    types = {"name": str, "target_size": float, "vintage_year": int, "is_active": bool}
+
+    converted, errors = validate_and_convert_row(row, 2, ["name"], types)
+
+    assert errors == []
+    assert converted == {"name": "Fund", "target_size": 1500000.5, "vintage_year": 2021, "is_active": True}
+
+
+def test_validate_and_convert_row_error_messages():
+    row = {"name": "Fund", "target_size": "lots", "inception_date": "someday"}
+    types = {"name": str, "target_size": float, "inception_date": datetime}
+
+    converted, errors = validate_and_convert_row(row, 7, ["name", "status"], types)
+    assert converted is None
+    assert errors == ["Row 7: Missing required field 'status'"]
+
+    converted, errors = validate_and_convert_row(row, 7, ["name"], types)
+    assert converted is None
+    assert errors == [
+        "Row 7: Invalid value for 'target_size': lots",
+        "Row 7: Invalid date format for 'inception_date'",
+    ]
@@ -1,89 +1,122 @@
 """
 Import/Export utility functions for handling XLSX and JSON file operations
 """
-import json
+import asyncio
 import io
-from typing import List, Dict, Any, Tuple, Optional, Callable
-from datetime import datetime
-from openpyxl import Workbook, load_workbook
+import re
+import tempfile
+import orjson
+from typing import List, Dict, Any, Tuple, Optional, Callable, AsyncIterable, AsyncIterator, BinaryIO
+from datetime import date, datetime, time
+from openpyxl import Workbook
+from python_calamine import CalamineWorkbook
 from openpyxl.utils import get_column_letter
+from pymongo.errors import BulkWriteError
 
+# Rows sent to MongoDB per insert_many call during imports
+IMPORT_BATCH_SIZE = 1000
 
-def export_to_xlsx(data: List[Dict[str, Any]], fields: List[str], sheet_name: str = "Data") -> io.BytesIO:
-    """Export data to XLSX format"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = sheet_name
+# (ordinal, ISO string) for the current day, refreshed when the date rolls over
+_cached_day: Tuple[int, str] = (0, "")
 
-    # Write headers
-    for col_idx, field in enumerate(fields, 1):
-        ws.cell(row=1, column=col_idx, value=field)
-        # Auto-adjust column width
-        ws.column_dimensions[get_column_letter(col_idx)].width = max(len(field) + 2, 15)
 
-    # Write data rows
-    for row_idx, item in enumerate(data, 2):
-        for col_idx, field in enumerate(fields, 1):
-            value = item.get(field)
-            # Convert datetime to string for Excel
-            if isinstance(value, datetime):
-                value = value.isoformat()
-            ws.cell(row=row_idx, column=col_idx, value=value)
+def today_iso() -> str:
+    """Get today's date as YYYY-MM-DD, formatting it only once per day"""
+    global _cached_day
+    today = date.today()
+    ordinal = today.toordinal()
+    if ordinal != _cached_day[0]:
+        _cached_day = (ordinal, today.isoformat())
+    return _cached_day[1]
 
-    # Save to BytesIO
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-    return output
 
+async def stream_xlsx(
+    rows: AsyncIterable[Dict[str, Any]],
+    fields: List[str],
+    sheet_name: str = "Data",
+    chunk_size: int = 64 * 1024
+) -> AsyncIterator[bytes]:
+    """
+    Stream an XLSX export from an async row source
+    Rows go through a write-only workbook, so they are never all held in memory
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
 
-def export_to_json(data: List[Dict[str, Any]], fields: List[str]) -> io.BytesIO:
-    """Export data to JSON format"""
-    # Filter data to only include specified fields
-    filtered_data = []
-    for item in data:
-        filtered_item = {}
+    # Column widths must be set before any rows are written
+    for col_idx, field in enumerate(fields, 1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = max(len(field) + 2, 15)
+    ws.append(fields)
+
+    async for item in rows:
+        values = []
         for field in fields:
             value = item.get(field)
-            # Convert datetime to string for JSON
+            # Convert datetime to string for Excel
             if isinstance(value, datetime):
                 value = value.isoformat()
-            filtered_item[field] = value
-        filtered_data.append(filtered_item)
-
-    output = io.BytesIO()
-    output.write(json.dumps(filtered_data, indent=2, default=str).encode('utf-8'))
-    output.seek(0)
-    return output
-
-
-def import_from_xlsx(file_content: bytes) -> Tuple[List[Dict[str, Any]], List[str]]:
+            values.append(value)
+        ws.append(values)
+
+    # The zip container can only be finalized once every row is written; spill to disk if it gets large
+    with tempfile.SpooledTemporaryFile(max_size=chunk_size * 16) as output:
+        await asyncio.to_thread(wb.save, output)
+        output.seek(0)
+        while chunk := output.read(chunk_size):
+            yield chunk
+
+
+async def stream_json(rows: AsyncIterable[Dict[str, Any]], fields: List[str]) -> AsyncIterator[bytes]:
+    """Stream a JSON array export from an async row source, one element per line"""
+    yield b"["
+    separator = b"\n"
+    async for item in rows:
+        yield separator + orjson.dumps({field: item.get(field) for field in fields}, default=str)
+        separator = b",\n"
+    yield b"\n]"
+
+
+def _calamine_value(value: Any) -> Any:
+    """Normalize a calamine cell value to what the row converters expect"""
+    if value == "":
+        return None
+    # Numeric cells always come back as floats; keep whole numbers as ints (e.g. phone numbers)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime.combine(value, time())
+    return value
+
+
+def import_from_xlsx(file: BinaryIO) -> Tuple[List[Dict[str, Any]], List[str]]:
     """
-    Import data from XLSX file
+    Import data from an XLSX file object
     Returns: (data_rows, errors)
     """
     errors = []
     data = []
 
     try:
-        wb = load_workbook(io.BytesIO(file_content))
-        ws = wb.active
+        wb = CalamineWorkbook.from_filelike(file)
+        sheet = wb.get_sheet_by_index(0)
+        # iter_rows converts one row at a time, so the sheet is never held as a full grid of values
+        # (it cannot be called on a sheet with no cells at all)
+        rows = sheet.iter_rows() if sheet.start is not None else iter(())
 
         # Get headers from first row
         headers = []
-        for col in range(1, ws.max_column + 1):
-            header = ws.cell(row=1, column=col).value
-            if header:
+        for col, header in enumerate(next(rows, []), 1):
+            if header not in (None, ""):
                 headers.append(str(header).strip())
             else:
                 headers.append(f"column_{col}")
 
         # Read data rows
-        for row_idx in range(2, ws.max_row + 1):
+        for row in rows:
             row_data = {}
             has_data = False
-            for col_idx, header in enumerate(headers, 1):
-                value = ws.cell(row=row_idx, column=col_idx).value
+            for header, value in zip(headers, row):
+                value = _calamine_value(value)
                 if value is not None:
                     has_data = True
                 row_data[header] = value
@@ -97,17 +130,17 @@ def import_from_xlsx(file_content: bytes) -> Tuple[List[Dict[str, Any]], List[st
     return data, errors
 
 
-def import_from_json(file_content: bytes) -> Tuple[List[Dict[str, Any]], List[str]]:
+def import_from_json(file: BinaryIO) -> Tuple[List[Dict[str, Any]], List[str]]:
     """
-    Import data from JSON file
+    Import data from a JSON file object
     Returns: (data_rows, errors)
     """
     errors = []
     data = []
 
     try:
-        content = file_content.decode('utf-8')
-        parsed = json.loads(content)
+        # orjson parses the raw bytes directly, validating UTF-8 as it goes
+        parsed = orjson.loads(file.read())
 
         if isinstance(parsed, list):
             data = parsed
@@ -117,7 +150,7 @@ def import_from_json(file_content: bytes) -> Tuple[List[Dict[str, Any]], List[st
         else:
             errors.append("JSON must be an array or object")
 
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         errors.append(f"Invalid JSON format: {str(e)}")
     except Exception as e:
         errors.append(f"Error reading JSON file: {str(e)}")
@@ -125,6 +158,67 @@ def import_from_json(file_content: bytes) -> Tuple[List[Dict[str, Any]], List[st
     return data, errors
 
 
+# Date formats accepted for datetime fields, tried in order
+DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%dT%H:%M:%S', '%m/%d/%Y', '%d/%m/%Y')
+TRUE_STRINGS = frozenset({'true', 'yes', '1', 'active'})
+# The exact layouts of the ISO entries in DATE_FORMATS. fromisoformat also accepts forms those
+# formats reject (space separators, offsets, week dates), so only these take its fast path
+_ISO_DATE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}(T[0-9]{2}:[0-9]{2}:[0-9]{2})?')
+
+
+class _InvalidDate(ValueError):
+    """Raised when a date string matches none of DATE_FORMATS"""
+
+
+def _to_float(value: Any) -> Optional[float]:
+    return float(value) if value else None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    return int(float(value)) if value else None
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.lower() in TRUE_STRINGS
+    return bool(value)
+
+
+def _to_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str):
+        return None
+    # ISO dates are by far the most common input; fromisoformat parses them in C
+    if _ISO_DATE.fullmatch(value):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise _InvalidDate(value)
+
+
+def _to_str(value: Any) -> Optional[str]:
+    return str(value).strip() if value else None
+
+
+# Converter for each field type, looked up once per cell instead of an if/elif chain
+_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    float: _to_float,
+    int: _to_int,
+    bool: _to_bool,
+    datetime: _to_datetime,
+    str: _to_str,
+}
+
+
 def validate_and_convert_row(
     row: Dict[str, Any],
     row_idx: int,
@@ -153,37 +247,12 @@ def validate_and_convert_row(
             converted[field] = None
             continue
 
-        expected_type = field_types.get(field, str)
-
         try:
-            if expected_type == float:
-                converted[field] = float(value) if value else None
-            elif expected_type == int:
-                converted[field] = int(float(value)) if value else None
-            elif expected_type == bool:
-                if isinstance(value, bool):
-                    converted[field] = value
-                elif isinstance(value, str):
-                    converted[field] = value.lower() in ('true', 'yes', '1', 'active')
-                else:
-                    converted[field] = bool(value)
-            elif expected_type == datetime:
-                if isinstance(value, datetime):
-                    converted[field] = value
-                elif isinstance(value, str):
-                    # Try common date formats
-                    for fmt in ['%Y-%m-%d', '%Y-%m-%dT%H:%M:%S', '%m/%d/%Y', '%d/%m/%Y']:
-                        try:
-                            converted[field] = datetime.strptime(value, fmt)
-                            break
-                        except ValueError:
-                            continue
-                    else:
-                        errors.append(f"Row {row_idx}: Invalid date format for '{field}'")
-                        converted[field] = None
-            else:
-                converted[field] = str(value).strip() if value else None
-        except (ValueError, TypeError) as e:
+            converted[field] = _CONVERTERS.get(field_types.get(field, str), _to_str)(value)
+        except _InvalidDate:
+            errors.append(f"Row {row_idx}: Invalid date format for '{field}'")
+            converted[field] = None
+        except (ValueError, TypeError):
             errors.append(f"Row {row_idx}: Invalid value for '{field}': {value}")
             converted[field] = None
 
@@ -201,24 +270,59 @@ def validate_and_convert_row(
     return converted, []
 
 
+async def insert_in_batches(
+    repo,
+    docs: List[Tuple[int, Dict[str, Any]]],
+    entity: str,
+    batch_size: int = IMPORT_BATCH_SIZE
+) -> Tuple[int, int, List[str]]:
+    """
+    Insert (row number, document) pairs with one insert_many per batch
+    Returns: (inserted_count, failed_count, errors)
+    """
+    inserted = 0
+    failed = 0
+    errors = []
+
+    for start in range(0, len(docs), batch_size):
+        batch = docs[start:start + batch_size]
+        try:
+            await repo.create_many([doc for _, doc in batch])
+            inserted += len(batch)
+        except BulkWriteError as e:
+            # Unordered inserts keep going past bad documents; report each failure against its row
+            batch_inserted = e.details.get("nInserted", 0)
+            inserted += batch_inserted
+            failed += len(batch) - batch_inserted
+            for write_error in e.details.get("writeErrors", []):
+                row_idx = batch[write_error["index"]][0]
+                errors.append(f"Row {row_idx}: Failed to create {entity} - {write_error.get('errmsg')}")
+        except Exception as e:
+            failed += len(batch)
+            errors.append(f"Rows {batch[0][0]}-{batch[-1][0]}: Failed to create {entity} - {str(e)}")
+
+    return inserted, failed, errors
+
+
 def generate_template_xlsx(fields: List[str], sample_data: List[Dict[str, Any]], sheet_name: str = "Template") -> io.BytesIO:
     """Generate a template XLSX file with headers and sample data"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = sheet_name
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
 
-    # Write headers
+    # Column widths must be set before any rows are written
     for col_idx, field in enumerate(fields, 1):
-        ws.cell(row=1, column=col_idx, value=field)
         ws.column_dimensions[get_column_letter(col_idx)].width = max(len(field) + 2, 15)
+    ws.append(fields)
 
-    # Write sample data
-    for row_idx, item in enumerate(sample_data, 2):
-        for col_idx, field in enumerate(fields, 1):
+    # Write sample data, one whole row at a time
+    for item in sample_data:
+        row = []
+        for field in fields:
             value = item.get(field)
             if isinstance(value, datetime):
                 value = value.strftime('%Y-%m-%d')
-            ws.cell(row=row_idx, column=col_idx, value=value)
+            row.append(value)
+        ws.append(row)
 
     output = io.BytesIO()
     wb.save(output)
@@ -239,7 +343,4 @@ def generate_template_json(fields: List[str], sample_data: List[Dict[str, Any]])
             filtered_item[field] = value
         template_data.append(filtered_item)
 
-    output = io.BytesIO()
-    output.write(json.dumps(template_data, indent=2, default=str).encode('utf-8'))
-    output.seek(0)
-    return output
+    return io.BytesIO(orjson.dumps(template_data, default=str, option=orjson.OPT_INDENT_2))
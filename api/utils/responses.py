@@ -0,0 +1,33 @@
+"""
+Response classes shared by the API routers
+"""
+from typing import Any, AsyncIterable, AsyncIterator
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+
+
+def json_default(value: Any) -> Any:
+    """Serialize values orjson does not handle natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class MongoJSONResponse(ORJSONResponse):
+    """
+    ORJSONResponse that also serializes MongoDB ObjectIds
+    List handlers return it directly: FastAPI only skips its jsonable_encoder pass for Response objects
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+async def ndjson_stream(docs: AsyncIterable[dict]) -> AsyncIterator[bytes]:
+    """Serialize raw MongoDB documents as newline-delimited JSON, exposing _id as "id" """
+    async for doc in docs:
+        if "_id" in doc:
+            doc["id"] = str(doc.pop("_id"))
+        yield orjson.dumps(doc, default=json_default) + b"\n"